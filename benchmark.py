@@ -0,0 +1,472 @@
+"""
+Üretim hattı performans ölçüm (benchmark) modülü
+Sentetik gereksinim dokümanları (1-1000 sayfa) üzerinde parser, prompt oluşturma,
+yanıt ayrıştırma, değerlendirme ve karşılaştırma adımlarını çevrimdışı bir model
+taklidiyle çalıştırır; verim, gecikme yüzdelikleri ve tepe bellek kullanımını JSON
+olarak raporlar. `--startup` ile uygulamanın ve modüllerin soğuk başlangıç (import)
+sürelerini ayrı süreçlerde ölçer.
+
+Kullanım:
+    python benchmark.py
+    python benchmark.py --sizes 1 10 100 --repeat 5 --output bench.json
+    python benchmark.py --startup --repeat 10
+"""
+import argparse
+import ast
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from xml.sax.saxutils import escape
+
+from comparison import ManualVsAutomatedComparison
+from generator import build_prompt, parse_model_response
+from metrics import TestCaseEvaluator
+from parser import extract_text_from_docx, extract_text_from_docx_stream, extract_text_from_pdf
+
+
+DEFAULT_SIZES = [1, 10, 100, 1000]
+LINES_PER_PAGE = 45
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+MANUAL_TESTS_FILE = os.path.join(PROJECT_DIR, 'examples', 'example_manual_tests.json')
+APP_FILE = os.path.join(PROJECT_DIR, 'test_generate.py')
+
+# Başlangıçta yüklenmemesi gereken ağır bağımlılıklar
+HEAVY_MODULES = ['google.generativeai', 'pandas', 'PyPDF2', 'docx']
+
+# Sentetik metin için kelime havuzları (PDF standart fontunda sorun çıkarmaması için ASCII)
+_SUBJECTS = ['Kullanici', 'Yonetici', 'Sistem', 'Misafir kullanici', 'Raporlama servisi']
+_ACTIONS = ['kayit olabilmelidir', 'giris yapabilmelidir', 'sifresini sifirlayabilmelidir',
+            'profilini guncelleyebilmelidir', 'rapor indirebilmelidir', 'oturumu kapatabilmelidir']
+_RULES = ['Email adresi gecerli formatta olmalidir',
+          'Sifre minimum {n} karakter uzunlugunda olmalidir',
+          '{n} basarisiz denemeden sonra hesap gecici olarak kilitlenmelidir',
+          'Islem {n} saniye icinde tamamlanmalidir',
+          'Alan bos birakilirsa hata mesaji gosterilmelidir',
+          'Baglanti {n} saat gecerlidir']
+
+
+def make_requirement_pages(pages: int, seed: int = 42) -> List[List[str]]:
+    """
+    Sayfalara bölünmüş sentetik gereksinim metni üret
+
+    Args:
+        pages: Sayfa sayısı
+        seed: Tekrarlanabilirlik için rastgelelik tohumu
+
+    Returns:
+        Her sayfa için satır listesi
+    """
+    rng = random.Random(seed)
+    result = []
+    section = 0
+    for page in range(pages):
+        lines = []
+        if page == 0:
+            lines += ['YAZILIM GEREKSINIM SPESIFIKASYONU', '1. GENEL BILGILER',
+                      '1.1. Proje Adi: Sentetik Benchmark Sistemi']
+        while len(lines) < LINES_PER_PAGE:
+            if not lines or rng.random() < 0.15:
+                section += 1
+                lines.append(f"2.{section}. Modul {section} Islemleri")
+            rule = rng.choice(_RULES).format(n=rng.randint(3, 64))
+            lines.append(f"- {rng.choice(_SUBJECTS)} {rng.choice(_ACTIONS)}; {rule}")
+        result.append(lines)
+    return result
+
+
+def write_synthetic_pdf(path: str, pages: List[List[str]]):
+    """Harici bağımlılık olmadan, sayfa başına bir metin akışı içeren basit PDF yaz"""
+    def pdf_escape(line: str) -> str:
+        return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+    objects = [None, None, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    page_refs = []
+    for lines in pages:
+        body = 'BT /F1 9 Tf 11 TL 40 800 Td\n' + '\n'.join(f"({pdf_escape(l)}) Tj T*" for l in lines) + '\nET'
+        objects.append(f"<< /Length {len(body.encode('latin-1'))} >>\nstream\n{body}\nendstream")
+        content_ref = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_ref} 0 R >>")
+        page_refs.append(f"{len(objects)} 0 R")
+    objects[0] = '<< /Type /Catalog /Pages 2 0 R >>'
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(page_refs)}] /Count {len(page_refs)} >>"
+
+    out = io.BytesIO()
+    out.write(b'%PDF-1.4\n')
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{obj}\nendobj\n".encode('latin-1'))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('latin-1'))
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode('latin-1'))
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode('latin-1'))
+
+    with open(path, 'wb') as f:
+        f.write(out.getvalue())
+
+
+def write_synthetic_docx(path: str, pages: List[List[str]]):
+    """Harici bağımlılık olmadan, her sayfa için paragraflar ve bir izlenebilirlik tablosu içeren DOCX yaz"""
+    w = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+    def paragraph(text: str) -> str:
+        return f"<w:p><w:r><w:t xml:space=\"preserve\">{escape(text)}</w:t></w:r></w:p>"
+
+    def cell(text: str) -> str:
+        return f"<w:tc>{paragraph(text)}</w:tc>"
+
+    body = []
+    for page_num, lines in enumerate(pages, start=1):
+        body.extend(paragraph(line) for line in lines)
+        rows = [cell('Gereksinim') + cell('Test') + cell('Durum')]
+        rows += [cell(f"REQ-{page_num}-{i}") + cell(f"TC-{page_num}-{i}") + cell('Kapsandi') for i in range(5)]
+        body.append('<w:tbl>' + ''.join(f"<w:tr>{row}</w:tr>" for row in rows) + '</w:tbl>')
+    document = (f"<?xml version=\"1.0\" encoding=\"UTF-8\" standalone=\"yes\"?>"
+                f"<w:document xmlns:w=\"{w}\"><w:body>{''.join(body)}</w:body></w:document>")
+
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/word/document.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+        '</Types>')
+    rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="word/document.xml"/></Relationships>')
+
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr('[Content_Types].xml', content_types)
+        docx.writestr('_rels/.rels', rels)
+        docx.writestr('word/document.xml', document)
+
+
+class OfflineModel:
+    """Ağ çağrısı yapmadan Gemini yanıtını taklit eden deterministik model"""
+
+    def __init__(self, latency: float = 0.0, cases_per_section: int = 3):
+        self.latency = latency
+        self.cases_per_section = cases_per_section
+
+    def generate(self, prompt: str) -> str:
+        """Prompt'taki her bölüm başlığı için test senaryoları içeren JSON metni döndür"""
+        if self.latency:
+            time.sleep(self.latency)
+
+        kinds = ['Basarili senaryo', 'Hatali giris', 'Sinir deger']
+        test_cases = []
+        for line in prompt.splitlines():
+            line = line.strip()
+            if not line.startswith('2.') or line.startswith('- '):
+                continue
+            for i in range(self.cases_per_section):
+                test_cases.append({
+                    'id': f"TC{len(test_cases) + 1:05d}",
+                    'baslik': f"{line} - {kinds[i % len(kinds)]}",
+                    'on_kosul': 'Sistem acik ve erisilebilir durumda olmali',
+                    'adimlar': '1. Ilgili sayfaya gidin\n2. Gerekli alanlari doldurun\n3. Kaydet butonuna tiklayin',
+                    'beklenen_sonuc': 'Sistem gereksinime uygun davranir'
+                })
+        return '```json\n' + json.dumps(test_cases, ensure_ascii=False) + '\n```'
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Doğrusal enterpolasyonla yüzdelik hesapla"""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize(durations: List[float]) -> Dict:
+    """Süre listesinin özet istatistiklerini döndür"""
+    return {
+        'mean': round(sum(durations) / len(durations), 6),
+        'min': round(min(durations), 6),
+        'max': round(max(durations), 6),
+        'p50': round(percentile(durations, 50), 6),
+        'p95': round(percentile(durations, 95), 6),
+        'p99': round(percentile(durations, 99), 6)
+    }
+
+
+def _load_manual_tests() -> List[Dict]:
+    if not os.path.exists(MANUAL_TESTS_FILE):
+        return []
+    with open(MANUAL_TESTS_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def run_pipeline(pdf_path: str, docx_path: str, model: OfflineModel,
+                 manual_tests: List[Dict],
+                 on_stage: Callable[[str], None] = lambda stage: None) -> Dict[str, float]:
+    """
+    Üretim hattını bir kez çalıştır ve adım sürelerini döndür
+
+    Args:
+        pdf_path: Sentetik PDF yolu
+        docx_path: Sentetik DOCX yolu
+        model: Çevrimdışı model
+        manual_tests: Karşılaştırma için manuel test senaryoları
+        on_stage: Her adım bittiğinde adım adıyla çağrılır (bellek ölçümü için)
+
+    Returns:
+        Adım adı -> süre (saniye)
+    """
+    durations = {}
+
+    def timed(stage: str, fn: Callable):
+        start = time.perf_counter()
+        value = fn()
+        durations[stage] = time.perf_counter() - start
+        on_stage(stage)
+        return value
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        text = timed('extract_pdf', lambda: extract_text_from_pdf(pdf_path))
+        timed('extract_docx', lambda: extract_text_from_docx(docx_path))
+        timed('extract_docx_stream', lambda: extract_text_from_docx_stream(docx_path))
+    prompt = timed('build_prompt', lambda: build_prompt(text))
+    raw_text = timed('model_offline', lambda: model.generate(prompt))
+    test_cases = timed('parse_response', lambda: parse_model_response(raw_text))
+    timed('evaluate', lambda: TestCaseEvaluator().evaluate_test_cases(test_cases))
+    timed('compare', lambda: ManualVsAutomatedComparison().compare(manual_tests, test_cases, text, 'benchmark'))
+
+    durations['total'] = sum(durations.values())
+    durations['_test_cases'] = len(test_cases)
+    durations['_chars'] = len(text)
+    return durations
+
+
+def measure_peak_memory(pdf_path: str, docx_path: str, model: OfflineModel,
+                        manual_tests: List[Dict]) -> Dict[str, int]:
+    """Her adımın tepe bellek kullanımını tracemalloc ile ayrı bir çalıştırmada ölç"""
+    peaks = {}
+
+    def record(stage: str):
+        peaks[stage] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        run_pipeline(pdf_path, docx_path, model, manual_tests, on_stage=record)
+    finally:
+        tracemalloc.stop()
+    peaks['total'] = max(peaks.values())
+    return peaks
+
+
+def benchmark_size(pages: int, repeat: int, model: OfflineModel, workdir: str) -> Dict:
+    """Belirli bir sayfa sayısı için benchmark çalıştır"""
+    page_lines = make_requirement_pages(pages)
+    pdf_path = os.path.join(workdir, f"synthetic_{pages}.pdf")
+    docx_path = os.path.join(workdir, f"synthetic_{pages}.docx")
+    write_synthetic_pdf(pdf_path, page_lines)
+    write_synthetic_docx(docx_path, page_lines)
+    manual_tests = _load_manual_tests()
+
+    runs = [run_pipeline(pdf_path, docx_path, model, manual_tests) for _ in range(repeat)]
+    stages = [key for key in runs[0] if not key.startswith('_')]
+    latency = {stage: summarize([run[stage] for run in runs]) for stage in stages}
+
+    chars = runs[0]['_chars']
+    total_p50 = latency['total']['p50']
+    extract_p50 = latency['extract_pdf']['p50']
+    return {
+        'pages': pages,
+        'chars': chars,
+        'pdf_bytes': os.path.getsize(pdf_path),
+        'docx_bytes': os.path.getsize(docx_path),
+        'test_cases': runs[0]['_test_cases'],
+        'repeat': repeat,
+        'latency_seconds': latency,
+        'throughput': {
+            'pages_per_second': round(pages / total_p50, 3) if total_p50 else None,
+            'chars_per_second': round(chars / total_p50, 1) if total_p50 else None,
+            'pdf_pages_per_second': round(pages / extract_p50, 3) if extract_p50 else None
+        },
+        'peak_memory_bytes': measure_peak_memory(pdf_path, docx_path, model, manual_tests)
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_benchmark(sizes: List[int], repeat: int = 3, model_latency: float = 0.0) -> Dict:
+    """
+    Tüm boyutlar için benchmark çalıştır
+
+    Args:
+        sizes: Sayfa sayıları
+        repeat: Her boyut için tekrar sayısı
+        model_latency: Çevrimdışı modelin yapay gecikmesi (saniye)
+
+    Returns:
+        JSON olarak kaydedilebilir benchmark raporu
+    """
+    model = OfflineModel(latency=model_latency)
+    workdir = tempfile.mkdtemp(prefix='benchmark_')
+    try:
+        results = []
+        for pages in sizes:
+            print(f"⏱️ {pages} sayfa ölçülüyor...", file=sys.stderr)
+            results.append(benchmark_size(pages, repeat, model, workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'model_latency': model_latency
+        },
+        'results': results
+    }
+
+
+_IMPORT_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'heavy_loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def app_import_modules(app_file: str = APP_FILE) -> List[str]:
+    """Uygulama dosyasının modül seviyesindeki import'larını döndür"""
+    with open(app_file, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return modules
+
+
+def project_modules(project_dir: str = PROJECT_DIR) -> List[str]:
+    """
+    Proje klasöründeki modülleri döndür
+
+    Streamlit uygulaması (import edildiğinde çalışır) ve benchmark'ın kendisi hariç
+    tüm .py dosyaları listelenir; böylece yeni eklenen modüller rapora otomatik girer.
+    """
+    excluded = {os.path.basename(APP_FILE), os.path.basename(__file__)}
+    return sorted(os.path.splitext(name)[0] for name in os.listdir(project_dir)
+                  if name.endswith('.py') and name not in excluded)
+
+
+def time_cold_import(modules: List[str], repeat: int) -> Dict:
+    """
+    Modülleri her seferinde yeni bir Python sürecinde import ederek süre ölç
+
+    Args:
+        modules: Sırayla import edilecek modüller
+        repeat: Tekrar sayısı
+
+    Returns:
+        Süre özeti ve import sonrası yüklenmiş ağır modüller
+    """
+    snippet = _IMPORT_SNIPPET.format(modules=modules, heavy=HEAVY_MODULES)
+    durations = []
+    heavy_loaded = []
+    for _ in range(repeat):
+        completed = subprocess.run([sys.executable, '-W', 'ignore', '-c', snippet], cwd=PROJECT_DIR,
+                                   capture_output=True, text=True)
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines()
+            return {'modules': modules, 'error': error[-1] if error else 'import hatası'}
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        durations.append(result['seconds'])
+        heavy_loaded = result['heavy_loaded']
+
+    return {'modules': modules, 'latency_seconds': summarize(durations), 'heavy_modules_loaded': heavy_loaded}
+
+
+def run_startup_benchmark(repeat: int = 5) -> Dict:
+    """
+    Uygulamanın soğuk başlangıç import maliyetini ölç
+
+    Args:
+        repeat: Her ölçüm için tekrar sayısı
+
+    Returns:
+        JSON olarak kaydedilebilir başlangıç raporu
+    """
+    print("⏱️ Başlangıç süreleri ölçülüyor...", file=sys.stderr)
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat
+        },
+        'startup': {
+            'app_imports': time_cold_import(app_import_modules(), repeat),
+            'modules': {name: time_cold_import([name], repeat) for name in project_modules() + HEAVY_MODULES}
+        }
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    arg_parser = argparse.ArgumentParser(description="Test üretim hattı benchmark'ı")
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                            help="Sentetik doküman sayfa sayıları (varsayılan: 1 10 100 1000)")
+    arg_parser.add_argument('--repeat', type=int, default=3, help="Her boyut için tekrar sayısı")
+    arg_parser.add_argument('--model-latency', type=float, default=0.0,
+                            help="Çevrimdışı modelin yapay gecikmesi (saniye)")
+    arg_parser.add_argument('--startup', action='store_true',
+                            help="Yalnızca uygulama başlangıç (import) sürelerini ölç")
+    arg_parser.add_argument('--output', help="Raporun yazılacağı JSON dosyası (varsayılan: stdout)")
+    args = arg_parser.parse_args(argv)
+
+    if args.startup:
+        report = run_startup_benchmark(args.repeat)
+    else:
+        report = run_benchmark(args.sizes, args.repeat, args.model_latency)
+    report_json = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report_json)
+        print(f"✅ Benchmark raporu kaydedildi: {args.output}", file=sys.stderr)
+    else:
+        print(report_json)
+
+
+if __name__ == "__main__":
+    main()
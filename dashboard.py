@@ -0,0 +1,234 @@
+"""
+Metrik paneli veri modülü
+Performans Metrikleri sekmesinin büyük metrik geçmişlerinde de hızlı kalması
+için metrik dosyasını artımlı okur, çalıştırma tablosunu hazırlar, filtreler,
+sayfalara böler ve grafikleri zaman aralıklarına indirger. Arayüze gönderilen
+satır sayısı her zaman MAX_PAGE_SIZE ve MAX_CHART_POINTS ile sınırlıdır.
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from metrics import (MetricsHistoryReader, get_aggregate_statistics,
+                     get_model_race_statistics, get_model_token_statistics)
+from model_router import ModelRouter
+
+
+# Her yenilemede arayüze gönderilecek en fazla tablo satırı ve grafik noktası
+MAX_PAGE_SIZE = 200
+MAX_CHART_POINTS = 500
+
+# Panelde ve istatistiklerde kullanılan kolonlar (hedge denemeleri gibi iç içe alanlar tabloya alınmaz)
+FRAME_COLUMNS = ['timestamp', 'file_name', 'file_type', 'model_name', 'success', 'file_content_length',
+                 'processing_time', 'parsing_time', 'ai_generation_time', 'total_test_cases',
+                 'coverage_score', 'hedge_winner', 'coalesced', 'input_tokens', 'output_tokens',
+                 'tokens_per_second', 'cost_usd', 'cost_per_test_case', 'reused_sections', 'novel_sections']
+CATEGORY_COLUMNS = ['file_name', 'file_type', 'model_name', 'hedge_winner']
+NUMERIC_COLUMNS = ['file_content_length', 'processing_time', 'parsing_time', 'ai_generation_time',
+                   'total_test_cases', 'coverage_score', 'input_tokens', 'output_tokens',
+                   'tokens_per_second', 'cost_usd', 'cost_per_test_case', 'reused_sections', 'novel_sections']
+
+# Grafik zaman aralıkları (küçükten büyüğe); nokta sayısını sınırda tutan ilk aralık seçilir
+BUCKET_FREQUENCIES = ['1min', '5min', '15min', '1h', '6h', '1D', '7D', '30D', '365D']
+
+
+def build_metrics_frame(metrics_history: List[Dict]) -> pd.DataFrame:
+    """
+    Metrik kayıtlarını panel tablosuna çevir
+
+    Zaman damgaları farklı hassasiyetlerde kaydedilmiş olabileceği için ISO 8601
+    olarak ayrıştırılır; okunamayan kayıtlar atılır. Satırlar dosyadaki kayıt
+    sırasında kalır, sayfalama en son kaydedilen çalıştırmayı başa alır.
+
+    Args:
+        metrics_history: Metrik dosyasından okunan kayıtlar
+
+    Returns:
+        Panel DataFrame'i
+    """
+    df = pd.DataFrame(metrics_history)
+    for col in FRAME_COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+    df = df[FRAME_COLUMNS]
+
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601', errors='coerce')
+    df = df[df['timestamp'].notna()]
+    df['success'] = df['success'].fillna(False).astype(bool)
+    # Alanı hiç olmayan eski kayıtlar da sayısal kalır, böylece eklenen parçalar aynı tipte birleşir
+    for col in NUMERIC_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+    # Tekrarlanan metinler kategorik tutularak bellek ve filtreleme maliyeti düşürülür;
+    # kategori tipi sabit tutulur ki boş ve dolu parçalar birleştirilebilsin
+    for col in CATEGORY_COLUMNS:
+        categories = pd.Index(df[col].dropna().unique(), dtype=object)
+        df[col] = pd.Categorical(df[col], categories=categories)
+
+    return df.reset_index(drop=True)
+
+
+def append_runs(frame: pd.DataFrame, new_frame: pd.DataFrame) -> pd.DataFrame:
+    """Yeni çalıştırmaları tablonun sonuna ekle, kategorik kolonları birleştir"""
+    if frame.empty:
+        return new_frame
+    if new_frame.empty:
+        return frame
+    combined = pd.concat([frame, new_frame], ignore_index=True)
+    for col in CATEGORY_COLUMNS:
+        combined[col] = union_categoricals([frame[col], new_frame[col]], ignore_order=True)
+    return combined
+
+
+class DashboardData:
+    """
+    Metrik dosyasını artımlı okuyan ve panel verilerini tutan önbellek
+
+    Her yenilemede yalnızca dosyaya son okumadan sonra eklenen satırlar okunur.
+    Toplu istatistikler ve yönlendirici yalnızca yeni kayıt geldiğinde, kayıt
+    listesi yerine kolon bazlı tablo üzerinden yeniden hesaplanır.
+    """
+
+    def __init__(self, metrics_file: str):
+        self._reader = MetricsHistoryReader(metrics_file)
+        self._lock = threading.Lock()
+        self._frame = build_metrics_frame([])
+        # Yarış istatistikleri iç içe hedge denemelerini gerektirir, yalnızca bunlar saklanır
+        self._hedged_runs: List[Dict] = []
+        self._snapshot = self._build_snapshot()
+
+    def _build_snapshot(self) -> Dict:
+        frame = self._frame
+        return {
+            'frame': frame,
+            'stats': get_aggregate_statistics(frame),
+            'token_stats': get_model_token_statistics(frame),
+            'race_stats': get_model_race_statistics(self._hedged_runs),
+            'router': ModelRouter(frame)
+        }
+
+    def refresh(self) -> Dict:
+        """
+        Yeni kayıtları okuyup panel verilerini güncelle
+
+        Returns:
+            frame, stats, token_stats, race_stats ve router alanlarını içeren,
+            oturumlar arasında paylaşılan salt okunur veri
+        """
+        with self._lock:
+            records, reset = self._reader.read_new()
+            if reset:
+                self._frame = build_metrics_frame([])
+                self._hedged_runs = []
+            if records or reset:
+                self._frame = append_runs(self._frame, build_metrics_frame(records))
+                self._hedged_runs.extend({'hedge_attempts': record['hedge_attempts'],
+                                          'coalesced': record.get('coalesced')}
+                                         for record in records if record.get('hedge_attempts'))
+                self._snapshot = self._build_snapshot()
+            return self._snapshot
+
+
+def filter_options(frame: pd.DataFrame) -> Dict:
+    """Filtre bileşenleri için model, dosya türü ve tarih aralığı seçenekleri"""
+    if frame.empty:
+        return {'models': [], 'file_types': [], 'min_date': None, 'max_date': None}
+    return {
+        'models': sorted(frame['model_name'].cat.categories),
+        'file_types': sorted(frame['file_type'].cat.categories),
+        'min_date': frame['timestamp'].min().date(),
+        'max_date': frame['timestamp'].max().date()
+    }
+
+
+def filter_runs(frame: pd.DataFrame,
+                models: Optional[List[str]] = None,
+                file_types: Optional[List[str]] = None,
+                start_date=None,
+                end_date=None,
+                successful_only: bool = True) -> pd.DataFrame:
+    """
+    Çalıştırmaları model, dosya türü ve tarih aralığına göre filtrele
+
+    Args:
+        frame: build_metrics_frame çıktısı
+        models: Gösterilecek modeller (boş ise hepsi)
+        file_types: Gösterilecek dosya türleri (boş ise hepsi)
+        start_date: Başlangıç günü (dahil)
+        end_date: Bitiş günü (dahil)
+        successful_only: Yalnızca başarılı çalıştırmalar
+
+    Returns:
+        Sıralaması korunmuş filtrelenmiş DataFrame
+    """
+    mask = pd.Series(True, index=frame.index)
+    if successful_only:
+        mask &= frame['success']
+    if models:
+        mask &= frame['model_name'].isin(models)
+    if file_types:
+        mask &= frame['file_type'].isin(file_types)
+    if start_date is not None:
+        mask &= frame['timestamp'] >= pd.Timestamp(start_date)
+    if end_date is not None:
+        mask &= frame['timestamp'] < pd.Timestamp(end_date) + pd.Timedelta(days=1)
+    return frame[mask]
+
+
+def paginate(frame: pd.DataFrame, page: int, page_size: int = 50) -> Tuple[pd.DataFrame, int]:
+    """
+    Tablonun tek bir sayfasını en son kaydedilen çalıştırma başta olacak şekilde döndür
+
+    Args:
+        frame: Filtrelenmiş DataFrame (kayıt sırasında)
+        page: 1'den başlayan sayfa numarası (geçersizse sınırlara çekilir)
+        page_size: Sayfa başına satır (en fazla MAX_PAGE_SIZE)
+
+    Returns:
+        (sayfa satırları, toplam sayfa sayısı)
+    """
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    total_pages = max(1, -(-len(frame) // page_size))
+    page = min(max(1, page), total_pages)
+    end = len(frame) - (page - 1) * page_size
+    return frame.iloc[max(0, end - page_size):end].iloc[::-1], total_pages
+
+
+def choose_bucket(start: pd.Timestamp, end: pd.Timestamp, max_points: int = MAX_CHART_POINTS) -> str:
+    """Zaman aralığını en fazla max_points noktaya bölen en küçük grafik aralığı"""
+    span_seconds = max((end - start).total_seconds(), 0)
+    for freq in BUCKET_FREQUENCIES:
+        if span_seconds / pd.Timedelta(freq).total_seconds() < max_points:
+            return freq
+    return BUCKET_FREQUENCIES[-1]
+
+
+def downsample(frame: pd.DataFrame, max_points: int = MAX_CHART_POINTS) -> Tuple[pd.DataFrame, str]:
+    """
+    Çalıştırmaları zaman aralıklarında topla
+
+    Her aralık için çalıştırma sayısı, ortalama ve en yüksek işlem süresi,
+    toplam ve ortalama test sayısı hesaplanır; çalıştırması olmayan aralıklar atılır.
+
+    Args:
+        frame: Filtrelenmiş DataFrame
+        max_points: En fazla grafik noktası
+
+    Returns:
+        (zaman indeksli özet DataFrame, kullanılan aralık)
+    """
+    if frame.empty:
+        return pd.DataFrame(), BUCKET_FREQUENCIES[0]
+
+    freq = choose_bucket(frame['timestamp'].min(), frame['timestamp'].max(), max_points)
+    grouped = frame.groupby(frame['timestamp'].dt.floor(freq))
+    summary = pd.DataFrame({
+        'runs': grouped.size(),
+        'avg_processing_time': grouped['processing_time'].mean(),
+        'max_processing_time': grouped['processing_time'].max(),
+        'total_test_cases': grouped['total_test_cases'].sum(),
+        'avg_test_cases': grouped['total_test_cases'].mean()
+    }).sort_index()
+    summary.index.name = 'timestamp'
+    return summary, freq
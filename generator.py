@@ -0,0 +1,125 @@
+"""
+Test senaryosu üretim modülü
+Prompt oluşturma, model çağrısı ve model yanıtının ayrıştırılması adımlarını içerir.
+google.generativeai yalnızca ilk model çağrısında yüklenir.
+"""
+import json
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from token_usage import usage_from_response
+from tracing import span
+
+
+_api_key: Optional[str] = None
+_configured_key: Optional[str] = None
+_configure_lock = threading.Lock()
+
+
+def configure(api_key: str):
+    """API anahtarını kaydet; istemci ilk model çağrısında yapılandırılır"""
+    global _api_key
+    _api_key = api_key
+
+
+def _get_genai():
+    """google.generativeai modülünü yükle ve gerekirse API anahtarıyla yapılandır"""
+    global _configured_key
+    import google.generativeai as genai
+
+    with _configure_lock:
+        if _api_key and _api_key != _configured_key:
+            genai.configure(api_key=_api_key)
+            _configured_key = _api_key
+    return genai
+
+
+def build_prompt(requirement_text: str) -> str:
+    """
+    Gemini'ye gönderilecek prompt'u oluştur
+
+    Args:
+        requirement_text: Gereksinim metni
+
+    Returns:
+        Prompt metni
+    """
+    return f"""
+                    Sen uzman bir Yazılım Test Mühendisisin.
+                    Aşağıdaki gereksinim metnini analiz et.
+                    Tüm olası sınır değerleri, hatalı girişleri ve mutlu yol (happy path) senaryolarını düşün.
+
+                    Gereksinim Metni:
+                    "{requirement_text}"
+
+                    Çıktıyı SADECE aşağıdaki JSON formatında ver, başka bir açıklama yapma:
+                    [
+                      {{"id": "TC001", "baslik": "...", "on_kosul": "...", "adimlar": "...", "beklenen_sonuc": "..."}},
+                      {{"id": "TC002", "baslik": "...", "on_kosul": "...", "adimlar": "...", "beklenen_sonuc": "..."}}
+                    ]
+                    """
+
+
+def parse_model_response(response_text: str) -> List[Dict]:
+    """
+    Model yanıtını JSON test senaryosu listesine çevir
+
+    Args:
+        response_text: Modelin ham metin çıktısı
+
+    Returns:
+        Test senaryoları listesi
+
+    Raises:
+        json.JSONDecodeError: Yanıt geçerli JSON değilse
+    """
+    cleaned_text = response_text.replace("```json", "").replace("```", "").strip()
+    return json.loads(cleaned_text)
+
+
+def call_model_with_usage(model_type: str, prompt: str,
+                          on_partial: Optional[Callable[[str], None]] = None) -> Tuple[str, Dict]:
+    """
+    Modeli çağır, ham metin yanıtını ve token kullanımını döndür
+
+    Args:
+        model_type: Kullanılacak model adı
+        prompt: Gönderilecek prompt
+        on_partial: Akış sırasında o ana kadar gelen metinle çağrılan fonksiyon (opsiyonel)
+
+    Returns:
+        (ham metin, token kullanımı) — kullanım yanıt meta verisinden, yoksa tahminle
+    """
+    with span('model_call', model=model_type, stream=on_partial is not None):
+        model = _get_genai().GenerativeModel(model_type)
+
+        if on_partial is None:
+            response = model.generate_content(prompt)
+            response_text = response.text
+        else:
+            # Akış modunda parçaları biriktirerek kısmi sonucu bildir
+            response = model.generate_content(prompt, stream=True)
+            response_text = ""
+            for chunk in response:
+                response_text += chunk.text
+                on_partial(response_text)
+
+        usage = usage_from_response(response, prompt, response_text)
+        usage['model_name'] = model_type
+        return response_text, usage
+
+
+def call_model(model_type: str, prompt: str,
+               on_partial: Optional[Callable[[str], None]] = None) -> str:
+    """
+    Modeli çağır ve ham metin yanıtını döndür
+
+    Args:
+        model_type: Kullanılacak model adı
+        prompt: Gönderilecek prompt
+        on_partial: Akış sırasında o ana kadar gelen metinle çağrılan fonksiyon (opsiyonel)
+
+    Returns:
+        Modelin ham metin çıktısı
+    """
+    return call_model_with_usage(model_type, prompt, on_partial)[0]
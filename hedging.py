@@ -0,0 +1,125 @@
+"""
+Hedged (yedekli) istek modülü
+Aynı prompt'u önce birincil modele, yapılandırılabilir bir gecikmeden sonra
+yedek modellere gönderir; ilk geçerli JSON yanıtı kazanır, diğer yanıtlar kullanılmaz.
+"""
+import contextvars
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Tuple
+
+from generator import call_model_with_usage, parse_model_response
+from tracing import span
+
+
+class HedgedGenerationError(Exception):
+    """Yarışa giren modellerin hiçbiri geçerli yanıt üretemediğinde fırlatılır"""
+
+    def __init__(self, message: str, attempts: List[Dict]):
+        super().__init__(message)
+        self.attempts = attempts
+
+
+def hedged_generate(prompt: str,
+                    primary_model: str,
+                    fallback_models: List[str],
+                    hedge_delay: float = 2.0,
+                    call_fn: Callable[[str, str], Tuple[str, Dict]] = call_model_with_usage,
+                    parse_fn: Callable[[str], List[Dict]] = parse_model_response) -> Dict:
+    """
+    Prompt'u birden fazla modele kademeli olarak gönder ve ilk geçerli sonucu al
+
+    Birincil model hemen çağrılır. Her `hedge_delay` saniyede bir (ya da o ana
+    kadar başlatılan tüm çağrılar başarısız olursa hemen) sıradaki yedek model
+    devreye girer. Geçerli JSON döndüren ilk model kazanır; henüz başlamamış
+    çağrılar iptal edilir, devam edenlerin sonuçları yok sayılır.
+
+    Args:
+        prompt: Gönderilecek prompt
+        primary_model: Birincil model adı
+        fallback_models: Sırayla devreye girecek yedek modeller
+        hedge_delay: Yedek modelin devreye girmesinden önceki bekleme (saniye)
+        call_fn: (model_adi, prompt) alıp (ham metin, token kullanımı) döndüren fonksiyon
+        parse_fn: Ham metni test senaryosu listesine çeviren fonksiyon
+
+    Returns:
+        Kazanan model, ham metin, test senaryoları, tüm denemelerin kayıtları ve
+        tamamlanan denemelerin token kullanımları (kaybedenler de maliyete dahildir)
+
+    Raises:
+        HedgedGenerationError: Hiçbir model geçerli yanıt üretemezse
+    """
+    models = [primary_model] + [m for m in fallback_models if m != primary_model]
+    attempts = {model: {'model_name': model, 'launch_offset': None, 'latency': None,
+                        'status': 'not_started', 'won': False, 'error_message': None,
+                        'usage': None}
+                for model in models}
+
+    def run(model: str):
+        start = time.perf_counter()
+        usage = None
+        try:
+            raw_text, usage = call_fn(model, prompt)
+            with span('json_cleanup', model=model, chars=len(raw_text)):
+                test_cases = parse_fn(raw_text)
+            return raw_text, test_cases, usage, time.perf_counter() - start, None
+        except json.JSONDecodeError as e:
+            return None, None, usage, time.perf_counter() - start, f"JSON parse hatası: {str(e)}"
+        except Exception as e:
+            return None, None, usage, time.perf_counter() - start, str(e)
+
+    executor = ThreadPoolExecutor(max_workers=len(models), thread_name_prefix='hedge')
+    race_start = time.perf_counter()
+    pending = {}
+    next_index = 0
+    next_launch = race_start
+    winner = None
+
+    try:
+        while winner is None:
+            now = time.perf_counter()
+            # Zamanı gelen ya da tüm çağrıları başarısız olan durumda sıradaki modeli başlat
+            if next_index < len(models) and (now >= next_launch or not pending):
+                model = models[next_index]
+                attempts[model]['launch_offset'] = round(now - race_start, 4)
+                attempts[model]['status'] = 'running'
+                # Aktif tracer ve span bağlamı yarış iş parçacıklarına da taşınır
+                pending[executor.submit(contextvars.copy_context().run, run, model)] = model
+                next_index += 1
+                next_launch = now + hedge_delay
+
+            if not pending:
+                break
+
+            timeout = max(0.0, next_launch - time.perf_counter()) if next_index < len(models) else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                model = pending.pop(future)
+                raw_text, test_cases, usage, latency, error = future.result()
+                attempts[model]['latency'] = round(latency, 4)
+                attempts[model]['usage'] = usage
+                if error is None and winner is None:
+                    attempts[model]['status'] = 'success'
+                    attempts[model]['won'] = True
+                    winner = {'model_name': model, 'raw_text': raw_text, 'test_cases': test_cases}
+                elif error is None:
+                    attempts[model]['status'] = 'success'
+                else:
+                    attempts[model]['status'] = 'failed'
+                    attempts[model]['error_message'] = error
+    finally:
+        # Kaybeden çağrılar beklenmez. Henüz başlamamış olanlar iptal edilir; çalışmakta
+        # olanlar durdurulamaz, tamamlanıp kota harcamaya devam eder ve 'abandoned' sayılır
+        for future, model in pending.items():
+            attempts[model]['status'] = 'cancelled' if future.cancel() else 'abandoned'
+        executor.shutdown(wait=False)
+
+    attempt_list = [attempts[model] for model in models]
+    if winner is None:
+        raise HedgedGenerationError("Hiçbir model geçerli JSON yanıtı üretemedi", attempt_list)
+
+    winner['attempts'] = attempt_list
+    winner['usages'] = [attempt['usage'] for attempt in attempt_list if attempt['usage']]
+    return winner
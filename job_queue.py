@@ -0,0 +1,315 @@
+"""
+Arka plan iş kuyruğu modülü
+Test senaryosu üretimlerini bir iş parçacığı havuzunda çalıştırır; arayüz iş
+kimliği ile durumu ve kısmi sonuçları sorgular, biten işler diske kaydedilir.
+"""
+import contextlib
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from generator import build_prompt, call_model_with_usage, parse_model_response
+from hedging import HedgedGenerationError, hedged_generate
+from metrics import METRICS_FILE, PerformanceMetrics, TestCaseEvaluator
+from requirement_index import RequirementIndex, merge_test_cases
+from singleflight import SharedCallError, SingleFlight, generation_key
+from tracing import Tracer, span
+
+
+# İş durumları
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+
+class GenerationJobQueue:
+    """Test senaryosu üretim işlerini arka planda çalıştıran kuyruk"""
+
+    def __init__(self, max_workers: int = 4, results_dir: str = 'jobs',
+                 metrics_file: str = METRICS_FILE, trace_dir: str = 'traces',
+                 index_file: str = 'requirement_index.json', max_saved_jobs: int = 200):
+        """
+        Args:
+            max_workers: Aynı anda çalışan en fazla iş
+            results_dir: Biten işlerin kaydedildiği klasör
+            metrics_file: Metriklerin kaydedildiği dosya
+            trace_dir: Trace ve profil çıktılarının klasörü
+            index_file: Bölüm dizini dosyası
+            max_saved_jobs: results_dir içinde saklanacak en fazla iş sonucu (en eskiler silinir)
+        """
+        self.results_dir = results_dir
+        self.max_saved_jobs = max_saved_jobs
+        self.trace_dir = trace_dir
+        self.metrics_file = metrics_file
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='generation')
+        # Yalnızca kuyruktaki ve çalışan işler bellekte tutulur, bitenler diskten okunur
+        self._jobs: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        # Özdeş eşzamanlı istekler tek bir model çağrısını paylaşır
+        self.single_flight = SingleFlight()
+        # Dokümanlar arasında tekrar eden bölümler için üretilmiş senaryolar
+        self.requirement_index = RequirementIndex(index_file)
+
+    def submit(self,
+               requirement_text: str,
+               model_type: str,
+               metrics: PerformanceMetrics,
+               save_metrics: bool = True,
+               fallback_models: Optional[List[str]] = None,
+               hedge_delay: float = 2.0,
+               tracer: Optional[Tracer] = None,
+               reuse_sections: bool = False) -> str:
+        """
+        Yeni bir üretim işi kuyruğa ekle
+
+        Args:
+            requirement_text: Gereksinim metni
+            model_type: Kullanılacak model adı
+            metrics: Parsing aşaması tamamlanmış performans metrikleri
+            save_metrics: Metrikler dosyaya kaydedilsin mi
+            fallback_models: Verilirse hedged istek modunda yarışa girecek yedek modeller
+            hedge_delay: Yedek modellerin devreye girmesinden önceki bekleme (saniye)
+            tracer: Verilirse iş bu tracer altında izlenir, trace dosyası dışa aktarılır
+            reuse_sections: Dizindeki aynı/yakın bölümlerin senaryoları yeniden kullanılır,
+                modele yalnızca yeni bölümler gönderilir
+
+        Returns:
+            İş kimliği
+        """
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            'job_id': job_id,
+            'status': JOB_QUEUED,
+            'created_at': datetime.now().isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'file_name': metrics.metrics.get('file_name'),
+            'model_name': model_type,
+            'partial_text': '',
+            'raw_text': None,
+            'test_cases': None,
+            'evaluation': None,
+            'metrics': None,
+            'error_message': None,
+            'trace_file': None,
+            'profile_file': None,
+            'trace_summary': None,
+            'section_reuse': None,
+            'export_error': None
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+
+        self._executor.submit(self._run, job_id, requirement_text, model_type, metrics,
+                              save_metrics, fallback_models or [], hedge_delay, tracer, reuse_sections)
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """İşin güncel durumunu döndür (bellekte yoksa diskten yükler)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        return self._load_job(job_id)
+
+    def list_jobs(self) -> List[Dict]:
+        """Kuyruktaki ve çalışan işleri oluşturulma sırasına göre döndür"""
+        with self._lock:
+            jobs = [dict(job) for job in self._jobs.values()]
+        return sorted(jobs, key=lambda job: job['created_at'])
+
+    def shutdown(self, wait: bool = True):
+        """İş parçacığı havuzunu kapat"""
+        self._executor.shutdown(wait=wait)
+
+    def _update(self, job_id: str, **fields):
+        """İş kaydını kilit altında güncelle"""
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _run(self, job_id: str, requirement_text: str, model_type: str,
+             metrics: PerformanceMetrics, save_metrics: bool,
+             fallback_models: List[str], hedge_delay: float,
+             tracer: Optional[Tracer], reuse_sections: bool):
+        """İşi çalıştır (iş parçacığı havuzunda)"""
+        self._update(job_id, status=JOB_RUNNING, started_at=datetime.now().isoformat())
+
+        status = JOB_FAILED
+        try:
+            with tracer.activate() if tracer else contextlib.nullcontext():
+                with span('generation_job', job_id=job_id, model=model_type):
+                    status = self._execute(job_id, requirement_text, model_type, metrics, save_metrics,
+                                           fallback_models, hedge_delay, reuse_sections)
+        except Exception as e:
+            # _execute hataları kendisi kaydeder; buraya yalnızca kayıt adımındaki hatalar düşer
+            self._update(job_id, error_message=str(e))
+
+        # Trace ve sonuç kaydı başarısız olsa da iş her zaman son durumuna ulaşır
+        if tracer:
+            try:
+                self._update(job_id,
+                             trace_file=tracer.export_chrome_trace(os.path.join(self.trace_dir, f"{job_id}.trace.json")),
+                             profile_file=tracer.export_profile(os.path.join(self.trace_dir, f"{job_id}.prof")),
+                             trace_summary=tracer.summary())
+            except Exception as e:
+                self._update(job_id, export_error=f"Trace dışa aktarılamadı: {str(e)}")
+
+        # Durum en son güncellenir, böylece arayüz tamamlanmış işi eksiksiz görür
+        self._update(job_id, status=status, finished_at=datetime.now().isoformat())
+        try:
+            self._persist(job_id)
+        except Exception as e:
+            # Kaydedilemeyen iş bellekte kalır
+            self._update(job_id, export_error=f"İş sonucu kaydedilemedi: {str(e)}")
+            return
+        # Kaydedilen iş bellekten çıkarılır; get_job bundan sonra diskten okur
+        with self._lock:
+            self._jobs.pop(job_id, None)
+        self._prune_results()
+
+    def _execute(self, job_id: str, requirement_text: str, model_type: str,
+                 metrics: PerformanceMetrics, save_metrics: bool,
+                 fallback_models: List[str], hedge_delay: float, reuse_sections: bool):
+        """Prompt oluşturma, model çağrısı, ayrıştırma ve değerlendirme adımları; işin son durumunu döndürür"""
+        raw_text = None
+
+        try:
+            reuse_plan = None
+            if reuse_sections:
+                with span('section_lookup'):
+                    reuse_plan = self.requirement_index.plan(requirement_text)
+                    # Modele dizinden gelen bölümler dışında kalan metin gönderilir
+                    requirement_text = reuse_plan['novel_text']
+                metrics.record_section_reuse(reuse_plan)
+                self._update(job_id, section_reuse=reuse_plan['report'])
+
+            model_call = not reuse_plan or bool(reuse_plan['novel_text'])
+            if model_call:
+                metrics.start_ai_generation(model_type)
+                with span('prompt_build', chars=len(requirement_text)):
+                    prompt = build_prompt(requirement_text)
+
+            if not model_call:
+                # Kalan metin yok (tüm bölümler dizinde): model çağrısı yapılmaz. Model adı ve AI süresi boş
+                # bırakılır, böylece bu çalıştırma model gecikmesi olarak sayılmaz
+                metrics.record_usage([])
+                data = []
+            elif fallback_models:
+                # Hedged mod: ilk geçerli JSON yanıtı veren model kazanır
+                key = generation_key(model_type, requirement_text, fallback_models)
+                try:
+                    result, coalesced = self.single_flight.do(
+                        key, lambda: hedged_generate(prompt, model_type, fallback_models, hedge_delay))
+                except (HedgedGenerationError, SharedCallError) as e:
+                    coalesced = isinstance(e, SharedCallError)
+                    error = e.error if coalesced else e
+                    metrics.end_ai_generation()
+                    metrics.record_coalescing(coalesced)
+                    if isinstance(error, HedgedGenerationError):
+                        # Başarısız yarışın denemeleri ve maliyeti de yalnızca yarışı başlatan işe yazılır
+                        metrics.record_hedge(None if coalesced else error.attempts)
+                        metrics.record_usage([] if coalesced else
+                                             [attempt['usage'] for attempt in error.attempts if attempt['usage']])
+                    raise error
+                metrics.end_ai_generation()
+                metrics.record_coalescing(coalesced)
+                # Paylaşılan çağrının maliyeti ve yarış denemeleri yalnızca çağrıyı yapan işe yazılır
+                metrics.record_usage([] if coalesced else result['usages'])
+                metrics.record_hedge(None if coalesced else result['attempts'], result['model_name'])
+                raw_text = result['raw_text']
+                data = result['test_cases']
+                self._update(job_id, model_name=result['model_name'])
+            else:
+                try:
+                    (raw_text, usage), coalesced = self.single_flight.do(
+                        generation_key(model_type, requirement_text),
+                        lambda: call_model_with_usage(model_type, prompt,
+                                                      on_partial=lambda text: self._update(job_id, partial_text=text)))
+                except Exception as e:
+                    coalesced = isinstance(e, SharedCallError)
+                    metrics.record_coalescing(coalesced)
+                    raise e.error if coalesced else e
+                metrics.end_ai_generation()
+                metrics.record_coalescing(coalesced)
+                metrics.record_usage([] if coalesced else [usage])
+
+                try:
+                    with span('json_cleanup', chars=len(raw_text)):
+                        data = parse_model_response(raw_text)
+                except json.JSONDecodeError as e:
+                    metrics.end_processing([], False, f"JSON parse hatası: {str(e)}")
+                    self._finish(job_id, metrics, save_metrics,
+                                 raw_text=raw_text,
+                                 error_message="Model çıktısı JSON formatında değil!")
+                    return JOB_FAILED
+
+            if reuse_plan:
+                with span('section_index_update', sections=len(reuse_plan['novel_sections'])):
+                    self.requirement_index.add_generated(reuse_plan['novel_sections'], data,
+                                                        metrics.metrics['model_name'])
+                data = merge_test_cases(data, reuse_plan['reused_test_cases'])
+
+            metrics.end_processing(data, True)
+            with span('evaluation', test_cases=len(data)):
+                evaluation = TestCaseEvaluator().evaluate_test_cases(data)
+            metrics.record_quality(evaluation)
+            self._finish(job_id, metrics, save_metrics,
+                         raw_text=raw_text, test_cases=data, evaluation=evaluation)
+            return JOB_DONE
+
+        except Exception as e:
+            metrics.end_processing([], False, str(e))
+            self._finish(job_id, metrics, save_metrics,
+                         raw_text=raw_text, error_message=str(e))
+            return JOB_FAILED
+
+    def _finish(self, job_id: str, metrics: PerformanceMetrics,
+                save_metrics: bool, **fields):
+        """Metrikleri kaydet ve iş sonucunu kayda işle"""
+        if save_metrics:
+            metrics.save_to_file(self.metrics_file)
+        self._update(job_id, metrics=metrics.get_metrics(), **fields)
+
+    def _job_path(self, job_id: str) -> str:
+        return os.path.join(self.results_dir, f"{job_id}.json")
+
+    def _persist(self, job_id: str):
+        """Biten işin sonucunu diske yaz"""
+        job = self.get_job(job_id)
+        os.makedirs(self.results_dir, exist_ok=True)
+        with open(self._job_path(job_id), 'w', encoding='utf-8') as f:
+            json.dump(job, f, indent=2, ensure_ascii=False)
+
+    def _prune_results(self):
+        """En yeni max_saved_jobs iş dışındaki kayıtları sil"""
+        try:
+            paths = [entry.path for entry in os.scandir(self.results_dir)
+                     if entry.is_file() and entry.name.endswith('.json')]
+        except OSError:
+            return
+        if len(paths) <= self.max_saved_jobs:
+            return
+        paths.sort(key=os.path.getmtime, reverse=True)
+        for path in paths[self.max_saved_jobs:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _load_job(self, job_id: str) -> Optional[Dict]:
+        """Diske kaydedilmiş işi yükle"""
+        filepath = self._job_path(job_id)
+        if not os.path.exists(filepath):
+            return None
+
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            return None
@@ -5,9 +5,107 @@ Test senaryosu üretim sürecinin metriklerini toplar ve değerlendirir.
 import json
 import time
 import os
+import threading
 from datetime import datetime
-from typing import Dict, List, Optional
-import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+from token_usage import calculate_cost
+from tracing import span
+
+
+# Metrikler satır başına bir JSON kaydı olarak dosyanın sonuna eklenir (JSON Lines)
+METRICS_FILE = 'metrics.jsonl'
+
+# Eşzamanlı işlerin metrik dosyasını aynı anda yazmasını engeller
+_save_lock = threading.Lock()
+
+
+def _is_legacy_array(filepath: str) -> bool:
+    """Dosya eski formatta (tek bir JSON dizisi) mı"""
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return f.read(64).lstrip().startswith('[')
+    except OSError:
+        return False
+
+
+def _write_jsonl(records: List[Dict], filepath: str):
+    with open(filepath, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def migrate_legacy_metrics(filepath: str = METRICS_FILE):
+    """
+    Eski tek dizi formatındaki metrikleri JSON Lines formatına çevir
+
+    Dosyanın kendisi eski formattaysa yerinde dönüştürülür. Dosya yoksa ve yanında
+    aynı adlı .json dosyası (eski metrics.json) varsa kayıtlar yeni dosyaya
+    aktarılır; eski dosyaya dokunulmaz.
+    """
+    source = filepath
+    if not os.path.exists(filepath):
+        source = os.path.splitext(filepath)[0] + '.json'
+        if source == filepath or not os.path.exists(source):
+            return
+    if not _is_legacy_array(source):
+        return
+    try:
+        with open(source, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+    except:
+        return
+    _write_jsonl(records, filepath)
+
+
+class MetricsHistoryReader:
+    """Metrik dosyasını kaldığı yerden okuyan artımlı okuyucu"""
+    
+    def __init__(self, filepath: str = METRICS_FILE):
+        self.filepath = filepath
+        self.offset = 0
+        self._inode = None
+    
+    def read_new(self) -> Tuple[List[Dict], bool]:
+        """
+        Son okumadan sonra eklenen kayıtları oku
+        
+        Yalnızca yeni satırlar okunur; yazılmakta olan yarım son satır bir sonraki
+        okumaya bırakılır. Dosya küçülmüş ya da değiştirilmişse baştan okunur.
+        
+        Returns:
+            (yeni kayıtlar, dosya baştan okunduysa True)
+        """
+        with _save_lock:
+            migrate_legacy_metrics(self.filepath)
+        if not os.path.exists(self.filepath):
+            reset = self.offset > 0
+            self.offset, self._inode = 0, None
+            return [], reset
+        
+        stat = os.stat(self.filepath)
+        reset = stat.st_size < self.offset or (self._inode is not None and stat.st_ino != self._inode)
+        if reset:
+            self.offset = 0
+        self._inode = stat.st_ino
+        
+        with open(self.filepath, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read()
+        end = data.rfind(b'\n')
+        if end < 0:
+            return [], reset
+        self.offset += end + 1
+        
+        records = []
+        for line in data[:end + 1].splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        return records, reset
 
 
 class PerformanceMetrics:
@@ -24,9 +122,22 @@ class PerformanceMetrics:
             'parsing_time': None,
             'ai_generation_time': None,
             'total_test_cases': None,
+            'coverage_score': None,
             'model_name': None,
             'success': None,
-            'error_message': None
+            'error_message': None,
+            'hedge_winner': None,
+            'hedge_attempts': None,
+            'coalesced': None,
+            'input_tokens': None,
+            'output_tokens': None,
+            'tokens_estimated': None,
+            'tokens_per_second': None,
+            'cost_usd': None,
+            'cost_per_test_case': None,
+            'reused_sections': None,
+            'novel_sections': None,
+            'reused_test_cases': None
         }
         self.start_time = None
         self.parsing_start = None
@@ -34,7 +145,7 @@ class PerformanceMetrics:
     
     def start_processing(self, file_name: str, file_type: str, file_size: int, content_length: int):
         """İşlem başlangıcını kaydet"""
-        self.start_time = time.time()
+        self.start_time = time.perf_counter()
         self.metrics['timestamp'] = datetime.now().isoformat()
         self.metrics['file_name'] = file_name
         self.metrics['file_type'] = file_type
@@ -43,28 +154,85 @@ class PerformanceMetrics:
     
     def start_parsing(self):
         """Dosya parsing başlangıcını kaydet"""
-        self.parsing_start = time.time()
+        self.parsing_start = time.perf_counter()
     
     def end_parsing(self):
         """Dosya parsing bitişini kaydet"""
         if self.parsing_start:
-            self.metrics['parsing_time'] = time.time() - self.parsing_start
+            self.metrics['parsing_time'] = time.perf_counter() - self.parsing_start
     
     def start_ai_generation(self, model_name: str):
         """AI üretim başlangıcını kaydet"""
-        self.ai_start = time.time()
+        self.ai_start = time.perf_counter()
         self.metrics['model_name'] = model_name
     
     def end_ai_generation(self):
         """AI üretim bitişini kaydet"""
         if self.ai_start:
-            self.metrics['ai_generation_time'] = time.time() - self.ai_start
+            self.metrics['ai_generation_time'] = time.perf_counter() - self.ai_start
+    
+    def record_hedge(self, attempts: Optional[List[Dict]], winner: Optional[str] = None):
+        """
+        Hedged istek denemelerini ve kazanan modeli kaydet
+        
+        Yarış süresi, geç başlatılan yedek modelin bekleme süresini de içerdiği için
+        model gecikmesi olarak kazananın kendi çağrı süresi kaydedilir. Paylaşılan
+        (birleştirilmiş) yarışta denemeler None verilir; aynı yarış yalnızca onu
+        başlatan çalıştırmada kaydedilir.
+        """
+        self.metrics['hedge_attempts'] = attempts
+        self.metrics['hedge_winner'] = winner
+        if winner:
+            self.metrics['model_name'] = winner
+            winner_attempt = next((a for a in attempts or [] if a['model_name'] == winner), None)
+            if winner_attempt and winner_attempt.get('latency') is not None:
+                self.metrics['ai_generation_time'] = winner_attempt['latency']
+                usage = winner_attempt.get('usage')
+                # Paylaşılan (birleştirilmiş) çağrıda bu çalıştırma token harcamadığı için hız hesaplanmaz
+                if usage and usage['output_tokens'] and self.metrics.get('output_tokens'):
+                    self.metrics['tokens_per_second'] = usage['output_tokens'] / winner_attempt['latency']
+    
+    def record_coalescing(self, coalesced: bool):
+        """Model çağrısının eşzamanlı özdeş bir istekle paylaşılıp paylaşılmadığını kaydet"""
+        self.metrics['coalesced'] = coalesced
+    
+    def record_usage(self, usages: List[Dict]):
+        """
+        Bu çalıştırmanın yaptığı model çağrılarının token kullanımını ve maliyetini kaydet
+        
+        Args:
+            usages: Her model çağrısı için model_name, input_tokens, output_tokens ve
+                estimated alanlarını içeren kayıtlar (paylaşılan çağrıda boş liste)
+        """
+        input_tokens = sum(u['input_tokens'] for u in usages)
+        output_tokens = sum(u['output_tokens'] for u in usages)
+        costs = [calculate_cost(u['model_name'], u['input_tokens'], u['output_tokens']) for u in usages]
+        
+        self.metrics['input_tokens'] = input_tokens
+        self.metrics['output_tokens'] = output_tokens
+        self.metrics['tokens_estimated'] = any(u['estimated'] for u in usages)
+        # Fiyatı bilinmeyen bir model varsa toplam maliyet hesaplanamaz
+        self.metrics['cost_usd'] = sum(costs) if all(c is not None for c in costs) else None
+        ai_time = self.metrics.get('ai_generation_time')
+        self.metrics['tokens_per_second'] = output_tokens / ai_time if ai_time and output_tokens else None
+    
+    def record_section_reuse(self, reuse_plan: Dict):
+        """Bölüm dizininden yeniden kullanılan ve modele gönderilen bölüm sayılarını kaydet"""
+        self.metrics['reused_sections'] = len(reuse_plan['report'])
+        self.metrics['novel_sections'] = len(reuse_plan['novel_sections'])
+        self.metrics['reused_test_cases'] = len(reuse_plan['reused_test_cases'])
+    
+    def record_quality(self, evaluation: Dict):
+        """TestCaseEvaluator sonucundaki kalite skorunu kaydet"""
+        self.metrics['coverage_score'] = evaluation.get('coverage_score')
     
     def end_processing(self, test_cases: List, success: bool = True, error_message: Optional[str] = None):
         """İşlem bitişini kaydet"""
         if self.start_time:
-            self.metrics['processing_time'] = time.time() - self.start_time
+            self.metrics['processing_time'] = time.perf_counter() - self.start_time
         self.metrics['total_test_cases'] = len(test_cases) if test_cases else 0
+        if self.metrics['cost_usd'] is not None and self.metrics['total_test_cases'] > 0:
+            self.metrics['cost_per_test_case'] = self.metrics['cost_usd'] / self.metrics['total_test_cases']
         self.metrics['success'] = success
         self.metrics['error_message'] = error_message
         return self.metrics
@@ -73,23 +241,12 @@ class PerformanceMetrics:
         """Mevcut metrikleri döndür"""
         return self.metrics.copy()
     
-    def save_to_file(self, filepath: str = 'metrics.json'):
-        """Metrikleri JSON dosyasına kaydet"""
-        # Eğer dosya varsa, mevcut verileri oku
-        all_metrics = []
-        if os.path.exists(filepath):
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    all_metrics = json.load(f)
-            except:
-                all_metrics = []
-        
-        # Yeni metrikleri ekle
-        all_metrics.append(self.metrics)
-        
-        # Dosyaya yaz
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(all_metrics, f, indent=2, ensure_ascii=False)
+    def save_to_file(self, filepath: str = METRICS_FILE):
+        """Metrikleri JSON Lines dosyasının sonuna ekle (mevcut kayıtlar okunmaz)"""
+        with span('metrics_persist', filepath=filepath), _save_lock:
+            migrate_legacy_metrics(filepath)
+            with open(filepath, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(self.metrics, ensure_ascii=False) + '\n')
         
         return filepath
 
@@ -167,23 +324,18 @@ class TestCaseEvaluator:
         }
 
 
-def load_metrics_history(filepath: str = 'metrics.json') -> List[Dict]:
-    """Kaydedilmiş metrik geçmişini yükle"""
-    if not os.path.exists(filepath):
-        return []
-    
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return []
+def load_metrics_history(filepath: str = METRICS_FILE) -> List[Dict]:
+    """Kaydedilmiş metrik geçmişinin tamamını yükle"""
+    return MetricsHistoryReader(filepath).read_new()[0]
 
 
 def get_aggregate_statistics(metrics_history: List[Dict]) -> Dict:
-    """Toplu istatistikler hesapla"""
-    if not metrics_history:
+    """Toplu istatistikler hesapla (kayıt listesi ya da DataFrame)"""
+    if len(metrics_history) == 0:
         return {}
     
+    import pandas as pd
+    
     df = pd.DataFrame(metrics_history)
     
     successful_runs = df[df['success'] == True] if 'success' in df.columns else df
@@ -202,5 +354,85 @@ def get_aggregate_statistics(metrics_history: List[Dict]) -> Dict:
     if 'ai_generation_time' in successful_runs.columns:
         stats['avg_ai_generation_time'] = successful_runs['ai_generation_time'].mean()
     
+    if 'input_tokens' in df.columns:
+        # Token ve maliyet (başarısız çalıştırmalar da kota harcadığı için tüm çalıştırmalar)
+        stats['total_input_tokens'] = int(df['input_tokens'].fillna(0).sum())
+        stats['total_output_tokens'] = int(df['output_tokens'].fillna(0).sum())
+        stats['total_cost_usd'] = float(df['cost_usd'].fillna(0).sum())
+        stats['avg_tokens_per_second'] = successful_runs['tokens_per_second'].mean()
+        stats['avg_cost_per_test_case'] = successful_runs['cost_per_test_case'].mean()
+    
+    if 'coalesced' in df.columns:
+        # Özdeş eşzamanlı isteklerle paylaşılan (ek model çağrısı yapılmayan) çalıştırmalar
+        tracked = df[df['coalesced'].notna()]
+        stats['coalesced_runs'] = int((tracked['coalesced'] == True).sum())
+        stats['coalescing_ratio'] = round(stats['coalesced_runs'] / len(tracked) * 100, 2) if len(tracked) > 0 else 0
+    
+    if 'reused_sections' in df.columns:
+        # Bölüm dizininden yeniden kullanılan (modele gönderilmeyen) bölümler
+        stats['reused_sections'] = int(df['reused_sections'].fillna(0).sum())
+        stats['novel_sections'] = int(df['novel_sections'].fillna(0).sum())
+        total_sections = stats['reused_sections'] + stats['novel_sections']
+        stats['section_reuse_ratio'] = round(stats['reused_sections'] / total_sections * 100, 2) if total_sections > 0 else 0
+    
     return stats
 
+
+def get_model_race_statistics(metrics_history: List[Dict]) -> List[Dict]:
+    """Hedged isteklerde her modelin kazanma oranını ve gecikmesini hesapla"""
+    rows = []
+    for run in metrics_history:
+        # Paylaşılan yarış, onu başlatan çalıştırmada zaten sayılır
+        if run.get('coalesced') is True:
+            continue
+        for attempt in run.get('hedge_attempts') or []:
+            if attempt.get('status') == 'not_started':
+                continue
+            rows.append(attempt)
+    
+    if not rows:
+        return []
+    
+    import pandas as pd
+    
+    df = pd.DataFrame(rows)
+    stats = []
+    for model_name, group in df.groupby('model_name'):
+        latencies = group['latency'].dropna()
+        stats.append({
+            'model_name': model_name,
+            'races': len(group),
+            'wins': int(group['won'].sum()),
+            'win_rate': round(group['won'].mean() * 100, 2),
+            'failures': int((group['status'] == 'failed').sum()),
+            'avg_latency': round(latencies.mean(), 3) if not latencies.empty else None,
+            'p99_latency': round(latencies.quantile(0.99), 3) if not latencies.empty else None
+        })
+    
+    return sorted(stats, key=lambda s: s['win_rate'], reverse=True)
+
+
+def get_model_token_statistics(metrics_history: List[Dict]) -> List[Dict]:
+    """Model bazında token kullanımı, hız ve maliyet istatistikleri (kayıt listesi ya da DataFrame)"""
+    import pandas as pd
+    
+    df = pd.DataFrame(metrics_history)
+    if df.empty or 'input_tokens' not in df.columns or 'model_name' not in df.columns:
+        return []
+    df = df[df['model_name'].notna() & df['input_tokens'].notna()]
+    if df.empty:
+        return []
+    
+    stats = []
+    for model_name, group in df.groupby('model_name', observed=True):
+        stats.append({
+            'model_name': model_name,
+            'runs': len(group),
+            'input_tokens': int(group['input_tokens'].sum()),
+            'output_tokens': int(group['output_tokens'].sum()),
+            'avg_tokens_per_second': round(group['tokens_per_second'].mean(), 2) if group['tokens_per_second'].notna().any() else None,
+            'total_cost_usd': round(group['cost_usd'].sum(), 6) if group['cost_usd'].notna().any() else None,
+            'avg_cost_per_test_case': round(group['cost_per_test_case'].mean(), 6) if group['cost_per_test_case'].notna().any() else None
+        })
+    
+    return sorted(stats, key=lambda s: s['input_tokens'] + s['output_tokens'], reverse=True)
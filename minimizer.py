@@ -0,0 +1,211 @@
+"""
+Test suiti küçültme ve önceliklendirme modülü
+Üretilen test senaryolarından, her gereksinim bölümünü ve her bölümdeki sınır
+değer/negatif kategorisini kapsamaya devam eden en küçük alt kümeyi açgözlü
+(greedy) küme örtüsü ile seçer, seçilen senaryoları riske göre sıralar ve
+kazanılan tahmini çalıştırma süresini raporlar.
+"""
+import math
+import re
+from typing import Dict, List, Set, Tuple
+
+from sections import split_sections, tokenize, turkish_lower
+
+
+# Kategori anahtar kelimeleri (küçük harf, düzenli ifade). Her giriş kelime başında
+# eşleşen bir köktür, böylece Türkçe ekli halleri de yakalanır ("hata" -> "hatası");
+# \b ile bitenler yalnızca tam kelime olarak eşleşir ("min" -> "admin" eşleşmez).
+NEGATIVE_KEYWORDS = ['hata', 'geçersiz', 'başarısız', 'yanlış', 'redded', 'boş bırak',
+                     'kilitlen', 'izin verilme', 'yetkisiz', 'olmayan', 'invalid', 'error', 'negatif']
+BOUNDARY_KEYWORDS = ['sınır', 'minimum', 'maksimum', r'en az\b', r'en fazla\b', 'karakter', 'limit',
+                     'uzunluk', 'süre dol', 'boundary', r'min\b', r'max\b']
+SECURITY_KEYWORDS = ['şifre', 'parola', 'güvenlik', 'yetki', 'oturum', 'kilit', 'ödeme',
+                     'sql', 'xss', 'token', 'password', 'auth']
+
+# Risk puanı ağırlıkları
+CATEGORY_WEIGHTS = {'negative': 3.0, 'boundary': 2.0, 'positive': 1.0}
+SECURITY_WEIGHT = 2.0
+SECTION_WEIGHT = 0.5
+
+
+def _keyword_pattern(keywords: List[str]) -> re.Pattern:
+    """
+    Anahtar kelimeleri kelime başında eşleşen tek bir ifadeye çevir
+
+    Kökten hemen sonra gelen -sız/-siz/-suz/-süz eki anlamı tersine çevirdiği
+    için ("hatasız", "sınırsız") bu durumlar eşleşme sayılmaz.
+    """
+    return re.compile(r'(?<!\w)(?:' + '|'.join(keywords) + r')(?!s[ıiuü]z)')
+
+
+_STEP_SPLIT = re.compile(r'(?:\n|(?:^|\s)\d+[.)]\s)')
+_NEGATIVE = _keyword_pattern(NEGATIVE_KEYWORDS)
+_BOUNDARY = _keyword_pattern(BOUNDARY_KEYWORDS)
+_SECURITY = _keyword_pattern(SECURITY_KEYWORDS)
+
+
+class TestSuiteMinimizer:
+    """Kapsamı koruyarak test suitini küçültür ve riske göre sıralar"""
+
+    def __init__(self,
+                 step_seconds: float = 20.0,
+                 setup_seconds: float = 30.0,
+                 min_match_score: float = 0.3,
+                 relative_match: float = 0.95):
+        """
+        Args:
+            step_seconds: Bir test adımının tahmini çalıştırma süresi (saniye)
+            setup_seconds: Her test senaryosunun sabit hazırlık süresi (saniye)
+            min_match_score: Bir senaryonun bir bölümü kapsadığı kabul edilen minimum eşleşme skoru
+            relative_match: En iyi eşleşmeye bu oranda yakın bölümler de kapsanmış sayılır
+        """
+        self.step_seconds = step_seconds
+        self.setup_seconds = setup_seconds
+        self.min_match_score = min_match_score
+        self.relative_match = relative_match
+
+    @staticmethod
+    def _case_text(test_case: Dict) -> str:
+        return ' '.join(str(test_case.get(field, '')) for field in ['baslik', 'on_kosul', 'adimlar', 'beklenen_sonuc'])
+
+    @staticmethod
+    def classify(test_case: Dict) -> Set[str]:
+        """Senaryonun kategorilerini (negative, boundary, positive) belirle"""
+        text = turkish_lower(TestSuiteMinimizer._case_text(test_case))
+        categories = set()
+        if _NEGATIVE.search(text):
+            categories.add('negative')
+        if _BOUNDARY.search(text):
+            categories.add('boundary')
+        return categories or {'positive'}
+
+    def estimate_seconds(self, test_case: Dict) -> float:
+        """Senaryonun adım sayısına göre tahmini çalıştırma süresi"""
+        steps = [step for step in _STEP_SPLIT.split(str(test_case.get('adimlar', ''))) if step.strip()]
+        return self.setup_seconds + max(len(steps), 1) * self.step_seconds
+
+    def map_cases_to_sections(self, test_cases: List[Dict], sections: List[Dict]) -> List[Set[int]]:
+        """
+        Her senaryonun kapsadığı bölümleri bul
+
+        Senaryo ve bölüm kelime kökleri IDF ağırlıklı örtüşme ile karşılaştırılır.
+        Ortak kelimeler (e-posta, şifre vb.) birçok bölümde geçtiği için yalnızca en iyi
+        eşleşen bölüm ve ona relative_match oranında yakın olanlar kapsanmış sayılır.
+
+        Returns:
+            Her senaryo için kapsanan bölüm indeksleri
+        """
+        section_tokens = [tokenize(section['text']) for section in sections]
+        document_frequency: Dict[str, int] = {}
+        for tokens in section_tokens:
+            for token in tokens:
+                document_frequency[token] = document_frequency.get(token, 0) + 1
+        idf = {token: math.log(1 + len(sections) / count) for token, count in document_frequency.items()}
+
+        mapping = []
+        for test_case in test_cases:
+            case_tokens = tokenize(self._case_text(test_case))
+            case_weight = sum(idf.get(token, 0) for token in case_tokens)
+            scores = []
+            for index, tokens in enumerate(section_tokens):
+                overlap = sum(idf[token] for token in case_tokens & tokens)
+                scores.append((overlap / case_weight if case_weight else 0, index))
+
+            best = max((score for score, _ in scores), default=0)
+            mapping.append({index for score, index in scores
+                            if score >= self.min_match_score and score >= best * self.relative_match})
+        return mapping
+
+    def risk_score(self, categories: Set[str], test_case: Dict, section_count: int) -> float:
+        """Kategori, güvenlik anahtar kelimeleri ve kapsanan bölüm sayısından risk puanı"""
+        score = max(CATEGORY_WEIGHTS[category] for category in categories)
+        text = turkish_lower(self._case_text(test_case))
+        if _SECURITY.search(text):
+            score += SECURITY_WEIGHT
+        return score + SECTION_WEIGHT * section_count
+
+    @staticmethod
+    def _coverage_elements(index: int, sections: Set[int], categories: Set[str]) -> Set[Tuple]:
+        """Senaryonun kapsadığı bölüm ve (bölüm, kategori) öğeleri"""
+        if not sections:
+            # Bölümle eşleşmeyen senaryonun neyi kapsadığı bilinmediği için kendi öğesi
+            # vardır, böylece suitten çıkarılmaz
+            return {('unmapped', index)}
+        risky = categories - {'positive'}
+        elements = {('section', section) for section in sections}
+        elements |= {('category', section, category) for section in sections for category in risky}
+        return elements
+
+    def minimize(self, test_cases: List[Dict], requirement_text: str) -> Dict:
+        """
+        Test suitini küçült ve önceliklendir
+
+        Args:
+            test_cases: Üretilen test senaryoları
+            requirement_text: Gereksinim metni
+
+        Returns:
+            Riske göre sıralı küçültülmüş suit, senaryo bazında öncelik bilgileri ve süre raporu
+        """
+        sections = split_sections(requirement_text)
+        mapping = self.map_cases_to_sections(test_cases, sections)
+
+        infos = []
+        for index, test_case in enumerate(test_cases):
+            categories = self.classify(test_case)
+            infos.append({
+                'index': index,
+                'id': test_case.get('id', f"#{index + 1}"),
+                'sections': mapping[index],
+                'categories': categories,
+                'elements': self._coverage_elements(index, mapping[index], categories),
+                'risk_score': self.risk_score(categories, test_case, len(mapping[index])),
+                'estimated_seconds': self.estimate_seconds(test_case)
+            })
+
+        # Açgözlü küme örtüsü: her adımda en çok kapsanmamış öğeyi kapsayan senaryo;
+        # eşitlikte yüksek riskli, sonra kısa süreli senaryo tercih edilir
+        uncovered = set().union(*(info['elements'] for info in infos)) if infos else set()
+        selected = []
+        remaining = list(infos)
+        while uncovered and remaining:
+            best = max(remaining, key=lambda info: (len(info['elements'] & uncovered),
+                                                    info['risk_score'], -info['estimated_seconds']))
+            if not best['elements'] & uncovered:
+                break
+            selected.append(best)
+            uncovered -= best['elements']
+            remaining.remove(best)
+
+        selected.sort(key=lambda info: (-info['risk_score'], info['index']))
+        covered_sections = set().union(*(info['sections'] for info in infos)) if infos else set()
+
+        original_seconds = sum(info['estimated_seconds'] for info in infos)
+        reduced_seconds = sum(info['estimated_seconds'] for info in selected)
+        selected_indices = {info['index'] for info in selected}
+
+        return {
+            'test_cases': [test_cases[info['index']] for info in selected],
+            'prioritized': [{
+                'id': info['id'],
+                'risk_score': round(info['risk_score'], 2),
+                'categories': ', '.join(sorted(info['categories'])),
+                'sections': ', '.join(sections[s]['section_id'] for s in sorted(info['sections'])),
+                'estimated_seconds': info['estimated_seconds']
+            } for info in selected],
+            'report': {
+                'original_count': len(test_cases),
+                'reduced_count': len(selected),
+                'reduction_percent': round((1 - len(selected) / len(test_cases)) * 100, 2) if test_cases else 0,
+                'original_seconds': original_seconds,
+                'reduced_seconds': reduced_seconds,
+                'time_saved_seconds': original_seconds - reduced_seconds,
+                'time_saved_percent': round((original_seconds - reduced_seconds) / original_seconds * 100, 2) if original_seconds else 0,
+                'section_count': len(sections),
+                'covered_sections': len(covered_sections),
+                'uncovered_sections': [f"{sections[s]['section_id']} {sections[s]['title']}"
+                                       for s in range(len(sections)) if s not in covered_sections],
+                'unmapped_ids': [info['id'] for info in infos if not info['sections']],
+                'removed_ids': [info['id'] for info in infos if info['index'] not in selected_indices]
+            }
+        }
@@ -0,0 +1,150 @@
+"""
+Otomatik model seçimi modülü
+metrics.jsonl geçmişindeki gecikme ve kalite kayıtlarını kullanarak, doküman
+boyutuna göre kalite eşiğini sağlayan en hızlı modeli seçer.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+
+# Doküman boyutu sınıfları (karakter sayısı üst sınırı)
+SIZE_BUCKETS = [
+    ('küçük', 10_000),
+    ('orta', 100_000),
+    ('büyük', None)
+]
+
+
+def size_bucket(content_length: int) -> str:
+    """Doküman uzunluğunun ait olduğu boyut sınıfını döndür"""
+    for name, upper in SIZE_BUCKETS:
+        if upper is None or content_length < upper:
+            return name
+    return SIZE_BUCKETS[-1][0]
+
+
+class ModelRouter:
+    """Geçmiş metriklere göre model seçen ve skor tablosu üreten yönlendirici"""
+
+    def __init__(self,
+                 metrics_history: List[Dict],
+                 quality_threshold: float = 80.0,
+                 min_success_rate: float = 80.0,
+                 min_runs: int = 3):
+        """
+        Args:
+            metrics_history: load_metrics_history ile yüklenen kayıtlar ya da panel DataFrame'i
+            quality_threshold: Kabul edilen minimum ortalama kalite skoru (%)
+            min_success_rate: Kabul edilen minimum başarı oranı (%)
+            min_runs: Bir modelin değerlendirmeye alınması için gereken minimum çalıştırma
+        """
+        self.quality_threshold = quality_threshold
+        self.min_success_rate = min_success_rate
+        self.min_runs = min_runs
+
+        df = pd.DataFrame(metrics_history)
+        required = ['model_name', 'success', 'ai_generation_time', 'file_content_length']
+        if df.empty or not all(col in df.columns for col in required):
+            self.history = pd.DataFrame(columns=required + ['coverage_score'])
+        else:
+            # Dizinden bölüm kullanan çalıştırmalarda model dokümanın yalnızca bir kısmını
+            # işlediği için süre doküman uzunluğuyla ölçeklenmez; bu kayıtlar gecikme
+            # geçmişine alınmaz
+            if 'reused_sections' in df.columns:
+                df = df[~(pd.to_numeric(df['reused_sections'], errors='coerce').fillna(0) > 0)]
+            # Paylaşılan (birleştirilmiş) çağrılar tek bir model çağrısıdır, yalnızca
+            # çağrıyı yapan çalıştırma sayılır
+            if 'coalesced' in df.columns:
+                df = df[~(df['coalesced'] == True)]
+            self.history = df[df['model_name'].notna()].copy()
+            if 'coverage_score' not in self.history.columns:
+                self.history['coverage_score'] = None
+
+    @staticmethod
+    def _seconds_per_unit(runs: pd.DataFrame) -> Optional[float]:
+        """
+        Boyuta göre normalize edilmiş medyan gecikme
+
+        Süre, (1 + karakter/1000) birimine bölünür; tahmin aynı birimle çarpılarak
+        yapılır, böylece sabit çağrı maliyeti ve boyuta bağlı maliyet birlikte hesaba katılır.
+        """
+        runs = runs.dropna(subset=['ai_generation_time', 'file_content_length'])
+        if runs.empty:
+            return None
+        units = 1 + runs['file_content_length'].astype(float) / 1000
+        return float((runs['ai_generation_time'].astype(float) / units).median())
+
+    def scoreboard(self, content_length: int) -> List[Dict]:
+        """
+        Her model için gerekçeli skor tablosu oluştur
+
+        Args:
+            content_length: Yönlendirilecek dokümanın karakter sayısı
+
+        Returns:
+            Tahmini süreye göre sıralı model satırları
+        """
+        bucket = size_bucket(content_length)
+        units = 1 + content_length / 1000
+        rows = []
+
+        for model_name, runs in self.history.groupby('model_name', observed=True):
+            successful = runs[runs['success'] == True]
+            success_rate = len(successful) / len(runs) * 100
+            quality = successful['coverage_score'].dropna().astype(float)
+            avg_quality = float(quality.mean()) if not quality.empty else None
+
+            # Aynı boyut sınıfında yeterli veri varsa onu, yoksa tüm geçmişi kullan
+            in_bucket = successful[successful['file_content_length'].fillna(0).astype(int).map(size_bucket) == bucket]
+            basis = 'boyut sınıfı' if len(in_bucket) >= self.min_runs else 'tüm geçmiş'
+            rate = self._seconds_per_unit(in_bucket if basis == 'boyut sınıfı' else successful)
+            estimated_time = rate * units if rate is not None else None
+
+            reasons = []
+            if len(runs) < self.min_runs:
+                reasons.append(f"yetersiz veri ({len(runs)}/{self.min_runs} çalıştırma)")
+            if success_rate < self.min_success_rate:
+                reasons.append(f"başarı oranı düşük (%{success_rate:.0f})")
+            if avg_quality is None:
+                reasons.append("kalite verisi yok")
+            elif avg_quality < self.quality_threshold:
+                reasons.append(f"kalite eşiğin altında (%{avg_quality:.1f} < %{self.quality_threshold:.0f})")
+            if estimated_time is None:
+                reasons.append("süre verisi yok")
+
+            rows.append({
+                'model_name': model_name,
+                'runs': len(runs),
+                'success_rate': round(success_rate, 2),
+                'avg_coverage_score': round(avg_quality, 2) if avg_quality is not None else None,
+                'estimated_time': round(estimated_time, 2) if estimated_time is not None else None,
+                'basis': basis,
+                'eligible': not reasons,
+                'reason': '; '.join(reasons) if reasons else f"uygun ({basis} verisine göre tahmin)"
+            })
+
+        return sorted(rows, key=lambda r: (not r['eligible'],
+                                           r['estimated_time'] if r['estimated_time'] is not None else float('inf')))
+
+    def select_model(self, content_length: int, default_model: str) -> Tuple[str, str]:
+        """
+        Kalite eşiğini sağlayan en hızlı modeli seç
+
+        Args:
+            content_length: Dokümanın karakter sayısı
+            default_model: Uygun model bulunamazsa kullanılacak model
+
+        Returns:
+            (seçilen model, seçim gerekçesi)
+        """
+        board = self.scoreboard(content_length)
+        eligible = [row for row in board if row['eligible']]
+        if not eligible:
+            return default_model, "Kalite eşiğini sağlayan model geçmişi yok, seçili model kullanıldı"
+
+        best = eligible[0]
+        return best['model_name'], (
+            f"Tahmini {best['estimated_time']:.2f}s, ortalama kalite %{best['avg_coverage_score']:.1f}, "
+            f"başarı oranı %{best['success_rate']:.0f} ({best['runs']} çalıştırma, {best['basis']})"
+        )
@@ -1,7 +1,37 @@
-import PyPDF2
-from docx import Document
 import sys
 import os
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+
+from tracing import span
+
+
+# WordprocessingML etiketleri (akışlı DOCX okuyucu için)
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_W_DOCUMENT = _W + 'document'
+_W_BODY = _W + 'body'
+_W_P = _W + 'p'
+_W_R = _W + 'r'
+_W_HYPERLINK = _W + 'hyperlink'
+_W_TBL = _W + 'tbl'
+_W_TR = _W + 'tr'
+_W_TC = _W + 'tc'
+_W_TRPR = _W + 'trPr'
+_W_TCPR = _W + 'tcPr'
+_W_VAL = _W + 'val'
+_W_TYPE = _W + 'type'
+
+# Run içindeki öğelerin metin karşılıkları (python-docx ile aynı)
+_RUN_TEXT = {
+    _W + 'tab': '\t',
+    _W + 'ptab': '\t',
+    _W + 'cr': '\n',
+    _W + 'noBreakHyphen': '-'
+}
+
+_OFFICE_DOCUMENT_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}Relationship'
 
 
 def extract_text_from_pdf(pdf_path):
@@ -14,6 +44,8 @@ def extract_text_from_pdf(pdf_path):
     Returns:
         Çıkarılan metin
     """
+    import PyPDF2
+    
     extracted_text = ""
     
     with open(pdf_path, 'rb') as pdf_file:
@@ -23,8 +55,9 @@ def extract_text_from_pdf(pdf_path):
         print(f"PDF'de {num_pages} sayfa bulundu.")
         
         for page_num in range(num_pages):
-            page = pdf_reader.pages[page_num]
-            text = page.extract_text()
+            with span('pdf_page', page=page_num + 1):
+                page = pdf_reader.pages[page_num]
+                text = page.extract_text()
             if text:
                 extracted_text += f"\n--- Sayfa {page_num + 1} ---\n"
                 extracted_text += text
@@ -42,41 +75,200 @@ def extract_text_from_docx(docx_path):
     Returns:
         Çıkarılan metin
     """
-    doc = Document(docx_path)
+    from docx import Document
+    
+    with span('docx_load'):
+        doc = Document(docx_path)
     extracted_text = ""
     
     # Paragrafları çıkar
-    for para in doc.paragraphs:
-        if para.text.strip():
-            extracted_text += para.text + "\n"
+    with span('docx_paragraphs'):
+        for para in doc.paragraphs:
+            if para.text.strip():
+                extracted_text += para.text + "\n"
     
     # Tablolardaki metinleri de çıkar
-    for table in doc.tables:
-        for row in table.rows:
-            row_text = []
-            for cell in row.cells:
-                if cell.text.strip():
-                    row_text.append(cell.text.strip())
-            if row_text:
-                extracted_text += " | ".join(row_text) + "\n"
+    for table_num, table in enumerate(doc.tables, start=1):
+        with span('docx_table', table=table_num):
+            for row in table.rows:
+                row_text = []
+                for cell in row.cells:
+                    if cell.text.strip():
+                        row_text.append(cell.text.strip())
+                if row_text:
+                    extracted_text += " | ".join(row_text) + "\n"
     
     print(f"DOCX dosyasından metin çıkarıldı.")
     return extracted_text
 
 
-def extract_text(file_path, output_path=None):
+def _run_text(run):
+    """w:r öğesinin metni (w:t, w:tab, w:br, w:cr, w:noBreakHyphen, w:ptab)"""
+    parts = []
+    for child in run:
+        if child.tag == _W + 't':
+            parts.append(child.text or "")
+        elif child.tag == _W + 'br':
+            # Yalnızca satır sonu "\n" üretir; sayfa ve sütun sonları boş metindir
+            if child.get(_W_TYPE, 'textWrapping') == 'textWrapping':
+                parts.append("\n")
+        elif child.tag in _RUN_TEXT:
+            parts.append(_RUN_TEXT[child.tag])
+    return "".join(parts)
+
+
+def _paragraph_text(paragraph):
+    """w:p öğesinin metni (doğrudan run'lar ve köprü içindeki run'lar)"""
+    parts = []
+    for child in paragraph:
+        if child.tag == _W_R:
+            parts.append(_run_text(child))
+        elif child.tag == _W_HYPERLINK:
+            parts.extend(_run_text(run) for run in child if run.tag == _W_R)
+    return "".join(parts)
+
+
+def _main_document_part(docx_zip):
+    """Paket ilişkilerinden ana doküman XML yolunu bul"""
+    try:
+        rels = ET.fromstring(docx_zip.read('_rels/.rels'))
+    except KeyError:
+        return 'word/document.xml'
+    for rel in rels.iter(_PKG_REL):
+        if rel.get('Type') == _OFFICE_DOCUMENT_REL:
+            return posixpath.normpath(rel.get('Target').lstrip('/'))
+    return 'word/document.xml'
+
+
+def extract_text_from_docx_stream(docx_path):
+    """
+    DOCX dosyasından python-docx nesne modeli kurmadan, akışlı olarak metin çıkarır.
+    
+    word/document.xml zip içinden artımlı XML ayrıştırıcı ile okunur ve işlenen
+    öğeler hemen bellekten atılır. Çıktı extract_text_from_docx ile aynıdır:
+    önce gövdedeki paragraflar, ardından tablo satırları (" | " ile birleştirilmiş),
+    her biri doküman sırasında. Yatay birleştirilmiş hücreler kapladıkları sütun
+    sayısı kadar, dikey birleştirilmiş hücreler üstteki hücrenin metniyle tekrarlanır.
+    
+    Args:
+        docx_path: DOCX dosyasının yolu
+    
+    Returns:
+        Çıkarılan metin
+    """
+    paragraphs = []
+    table_rows = []
+    
+    # Açık öğe yığını ve en üst seviye tablonun durumu
+    stack = []
+    row_cells = []
+    grid_before = 0
+    cell_paragraphs = []
+    cell_span = 1
+    cell_vmerge = None
+    previous_grid = {}
+    
+    with span('docx_stream'), zipfile.ZipFile(docx_path) as docx_zip:
+        with docx_zip.open(_main_document_part(docx_zip)) as document_xml:
+            for event, elem in ET.iterparse(document_xml, events=('start', 'end')):
+                if event == 'start':
+                    stack.append(elem)
+                    if elem.tag == _W_TR and len(stack) == 4:
+                        row_cells = []
+                        grid_before = 0
+                    elif elem.tag == _W_TC and len(stack) == 5:
+                        cell_paragraphs = []
+                        cell_span = 1
+                        cell_vmerge = None
+                    continue
+                
+                stack.pop()
+                depth = len(stack)
+                parent = stack[-1] if stack else None
+                
+                # Gövde seviyesi: document/body/<öğe>
+                if depth == 2 and parent.tag == _W_BODY:
+                    if elem.tag == _W_P:
+                        paragraphs.append(_paragraph_text(elem))
+                    elif elem.tag == _W_TBL:
+                        previous_grid = {}
+                    parent.remove(elem)
+                
+                # Tablo satırı: document/body/tbl/tr
+                elif depth == 3 and elem.tag == _W_TR and parent.tag == _W_TBL:
+                    grid = {}
+                    offset = grid_before
+                    texts = []
+                    for text, grid_span, vmerge in row_cells:
+                        if vmerge == 'continue':
+                            # Dikey birleştirme: üst satırdaki aynı sütundaki kök hücre
+                            text, grid_span = previous_grid.get(offset, ("", grid_span))
+                        grid[offset] = (text, grid_span)
+                        texts.extend([text] * grid_span)
+                        offset += grid_span
+                    previous_grid = grid
+                    
+                    row_text = [text.strip() for text in texts if text.strip()]
+                    if row_text:
+                        table_rows.append(" | ".join(row_text))
+                    parent.remove(elem)
+                
+                # Satır özellikleri: document/body/tbl/tr/trPr
+                elif depth == 4 and elem.tag == _W_TRPR and parent.tag == _W_TR and stack[2].tag == _W_TBL:
+                    value = elem.find(_W + 'gridBefore')
+                    grid_before = int(value.get(_W_VAL, 0)) if value is not None else 0
+                
+                # Hücre: document/body/tbl/tr/tc
+                elif depth == 4 and elem.tag == _W_TC and parent.tag == _W_TR and stack[2].tag == _W_TBL:
+                    row_cells.append(("\n".join(cell_paragraphs), cell_span, cell_vmerge))
+                    parent.remove(elem)
+                
+                # Hücre özellikleri ve paragrafları: document/body/tbl/tr/tc/<öğe>
+                elif depth == 5 and parent.tag == _W_TC and stack[2].tag == _W_TBL:
+                    if elem.tag == _W_TCPR:
+                        value = elem.find(_W + 'gridSpan')
+                        cell_span = int(value.get(_W_VAL, 1)) if value is not None else 1
+                        value = elem.find(_W + 'vMerge')
+                        if value is not None:
+                            cell_vmerge = value.get(_W_VAL, 'continue')
+                    elif elem.tag == _W_P:
+                        cell_paragraphs.append(_paragraph_text(elem))
+    
+    extracted_text = ""
+    for text in paragraphs:
+        if text.strip():
+            extracted_text += text + "\n"
+    for row_text in table_rows:
+        extracted_text += row_text + "\n"
+    
+    print(f"DOCX dosyasından metin çıkarıldı.")
+    return extracted_text
+
+
+# extract_text için seçilebilir DOCX okuyucuları
+DOCX_ENGINES = {
+    'python-docx': extract_text_from_docx,
+    'stream': extract_text_from_docx_stream
+}
+
+
+def extract_text(file_path, output_path=None, docx_engine='python-docx'):
     """
     PDF veya DOCX dosyasından metin çıkarır ve TXT olarak kaydeder.
     
     Args:
         file_path: Dosyanın yolu (PDF veya DOCX)
         output_path: Çıktı TXT dosyasının yolu (opsiyonel)
+        docx_engine: DOCX okuyucu; 'python-docx' (varsayılan) veya büyük tablolar
+            için daha hızlı ve az bellek kullanan 'stream'
     
     Returns:
         Çıkarılan metin
     """
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"Dosya bulunamadı: {file_path}")
+    if docx_engine not in DOCX_ENGINES:
+        raise ValueError(f"Bilinmeyen DOCX okuyucu: {docx_engine}. Seçenekler: {', '.join(DOCX_ENGINES)}")
     
     # Dosya uzantısını kontrol et
     _, ext = os.path.splitext(file_path)
@@ -87,7 +279,7 @@ def extract_text(file_path, output_path=None):
     elif ext in ['.docx', '.doc']:
         if ext == '.doc':
             print("Uyarı: .doc dosyaları tam desteklenmeyebilir. .docx formatını tercih edin.")
-        extracted_text = extract_text_from_docx(file_path)
+        extracted_text = DOCX_ENGINES[docx_engine](file_path)
     else:
         raise ValueError(f"Desteklenmeyen dosya formatı: {ext}. Desteklenen formatlar: .pdf, .docx")
     
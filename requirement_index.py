@@ -0,0 +1,283 @@
+"""
+Gereksinim bölüm dizini modülü
+Farklı dokümanlarda tekrar eden gereksinim bölümlerini (giriş, kayıt, şifre
+sıfırlama vb.) normalize edilmiş halleriyle ve onlar için üretilmiş test
+senaryolarıyla birlikte saklar. Yeni bir dokümanın aynı ya da neredeyse aynı
+bölümleri dizindeki senaryoları yeniden kullanır; modele yalnızca yeni bölümler
+gönderilir.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from minimizer import TestSuiteMinimizer
+from sections import heading_id, is_page_marker, split_sections, turkish_lower
+
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+_NUMBER = re.compile(r'\d+(?:[.,]\d+)?')
+
+# Yakın kopya karşılaştırmasında kullanılan kelime n-gram uzunluğu
+SHINGLE_SIZE = 2
+# Yakın kopya sayılmak için gereken en az n-gram sayısı (çok kısa bölümler yalnızca birebir eşleşir)
+MIN_SHINGLES = 8
+
+
+def normalize_section(section: Dict) -> str:
+    """
+    Bölümü karşılaştırma için normalize et
+
+    Bölüm numarası, madde işaretleri, noktalama ve büyük/küçük harf farkları
+    atılır; böylece farklı dokümanlarda farklı numaralanmış aynı bölüm aynı
+    metne düşer.
+    """
+    return ' '.join(_WORD.findall(turkish_lower(section['text'])))
+
+
+def section_hash(normalized_text: str) -> str:
+    """Normalize edilmiş bölüm metninin SHA-256 özeti"""
+    return hashlib.sha256(normalized_text.encode('utf-8')).hexdigest()
+
+
+def shingles(normalized_text: str) -> Set[str]:
+    """Normalize edilmiş metnin kelime n-gram kümesi"""
+    words = normalized_text.split()
+    if len(words) < SHINGLE_SIZE:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def merge_test_cases(generated: List[Dict], reused: List[Dict]) -> List[Dict]:
+    """
+    Üretilen ve dizinden gelen senaryoları birleştir
+
+    Aynı içerikli senaryolar bir kez alınır, kimlikler TC001'den başlayarak
+    yeniden numaralandırılır.
+    """
+    merged = []
+    seen = set()
+    for test_case in generated + reused:
+        content = {key: value for key, value in test_case.items() if key != 'id'}
+        fingerprint = json.dumps(content, sort_keys=True, ensure_ascii=False)
+        if fingerprint in seen:
+            continue
+        seen.add(fingerprint)
+        merged.append({'id': f"TC{len(merged) + 1:03d}", **content})
+    return merged
+
+
+class RequirementIndex:
+    """Normalize edilmiş gereksinim bölümlerini ve test senaryolarını saklayan dizin"""
+
+    def __init__(self,
+                 index_file: str = 'requirement_index.json',
+                 similarity_threshold: float = 0.8):
+        """
+        Args:
+            index_file: Dizinin kaydedileceği JSON dosyası
+            similarity_threshold: Yakın kopya sayılmak için gereken minimum Jaccard benzerliği
+        """
+        self.index_file = index_file
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.Lock()
+        self.sections: Dict[str, Dict] = {}
+        # n-gram -> bölüm özetleri (aday bölümleri bulmak için ters dizin)
+        self._postings: Dict[str, Set[str]] = {}
+        self._shingles: Dict[str, Set[str]] = {}
+        self._load()
+
+    def _load(self):
+        """Dizin dosyasını yükle ve ters dizini oluştur"""
+        if not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                sections = json.load(f)
+        except:
+            return
+        for digest, entry in sections.items():
+            self._add_entry(digest, entry)
+
+    def _add_entry(self, digest: str, entry: Dict):
+        self.sections[digest] = entry
+        entry_shingles = shingles(entry['text'])
+        self._shingles[digest] = entry_shingles
+        for shingle in entry_shingles:
+            self._postings.setdefault(shingle, set()).add(digest)
+
+    def save(self):
+        """Dizini dosyaya yaz"""
+        with self._lock, open(self.index_file, 'w', encoding='utf-8') as f:
+            json.dump(self.sections, f, indent=2, ensure_ascii=False)
+
+    def lookup(self, normalized_text: str) -> Tuple[Optional[str], float, Optional[str]]:
+        """
+        Bölümün dizindeki karşılığını bul
+
+        Önce birebir özet eşleşmesi aranır. Bulunamazsa ortak n-gram içeren
+        bölümler arasında en yüksek Jaccard benzerliği hesaplanır. Sayılar
+        (sınır değerleri) farklıysa bölümler yakın kopya sayılmaz.
+
+        Returns:
+            (bölüm özeti, benzerlik, 'exact' ya da 'near'); eşleşme yoksa (None, en iyi benzerlik, None)
+        """
+        digest = section_hash(normalized_text)
+        with self._lock:
+            if digest in self.sections:
+                return digest, 1.0, 'exact'
+
+            query = shingles(normalized_text)
+            if len(query) < MIN_SHINGLES:
+                return None, 0.0, None
+
+            # Ortak n-gram sayısı ters dizinden sayılır, yalnızca adaylar karşılaştırılır
+            overlaps = Counter()
+            for shingle in query:
+                overlaps.update(self._postings.get(shingle, ()))
+
+            numbers = _NUMBER.findall(normalized_text)
+            best_digest, best_similarity = None, 0.0
+            for candidate, shared in overlaps.items():
+                candidate_shingles = self._shingles[candidate]
+                if len(candidate_shingles) < MIN_SHINGLES:
+                    continue
+                similarity = shared / (len(query) + len(candidate_shingles) - shared)
+                if similarity > best_similarity and \
+                        _NUMBER.findall(self.sections[candidate]['text']) == numbers:
+                    best_digest, best_similarity = candidate, similarity
+
+        if best_digest is not None and best_similarity >= self.similarity_threshold:
+            return best_digest, best_similarity, 'near'
+        return None, best_similarity, None
+
+    def plan(self, requirement_text: str) -> Dict:
+        """
+        Dokümanı dizinde bulunan ve yeni bölümlere ayır
+
+        Modele gönderilecek metin, dizinden gelen bölümlerin kapsadığı satırlar
+        dışındaki tüm satırlardır; böylece ilk başlıktan önceki metin ve içeriği
+        olmayan numaralı satırlar (ör. "7.1. Kart numarası 16 haneli olmalıdır")
+        da modele gider. Kalan metin yalnızca dizinden gelen bölümlerin üst
+        başlıklarından oluşuyorsa boş döner ve model çağrısı gerekmez.
+
+        Args:
+            requirement_text: Gereksinim metni
+
+        Returns:
+            Yeni bölümler, modele gönderilecek metin (bölüm tekrar kullanılmıyorsa
+            orijinal metin), dizinden gelen senaryolar ve bölüm bazında rapor
+        """
+        novel_sections = []
+        reused_sections = []
+        reused_test_cases = []
+        report = []
+
+        for section in split_sections(requirement_text):
+            normalized = normalize_section(section)
+            digest, similarity, match = self.lookup(normalized)
+            if digest is None:
+                novel_sections.append(section)
+                continue
+
+            with self._lock:
+                entry = self.sections[digest]
+                entry['reuse_count'] = entry.get('reuse_count', 0) + 1
+            reused_sections.append(section)
+            reused_test_cases.extend(entry['test_cases'])
+            report.append({
+                'section_id': section['section_id'],
+                'title': section['title'],
+                'match': match,
+                'similarity': round(similarity, 3),
+                'test_cases': len(entry['test_cases'])
+            })
+
+        if report:
+            novel_text = self._remaining_text(requirement_text, reused_sections)
+        else:
+            novel_text = requirement_text
+
+        return {
+            'novel_sections': novel_sections,
+            'novel_text': novel_text,
+            'reused_test_cases': reused_test_cases,
+            'report': report
+        }
+
+    @staticmethod
+    def _remaining_text(requirement_text: str, reused_sections: List[Dict]) -> str:
+        """Dizinden gelen bölümlerin satırları çıkarıldıktan sonra kalan metin"""
+        covered = set()
+        for section in reused_sections:
+            covered.update(range(section['start_line'], section['end_line']))
+        reused_ids = [section['section_id'] for section in reused_sections]
+
+        remaining = []
+        has_content = False
+        for index, line in enumerate(requirement_text.splitlines()):
+            if index in covered or is_page_marker(line):
+                continue
+            remaining.append(line)
+            if not line.strip():
+                continue
+            # Dizinden gelen bölümlerin üst başlıkları tek başına model çağrısı gerektirmez
+            number = heading_id(line)
+            if number is None or not any(reused.startswith(number + '.') for reused in reused_ids):
+                has_content = True
+
+        return '\n'.join(remaining).strip() if has_content else ''
+
+    def add_generated(self, sections: List[Dict], test_cases: List[Dict], model_name: str) -> int:
+        """
+        Yeni bölümleri onlar için üretilen senaryolarla birlikte dizine ekle ve kaydet
+
+        Dizin, plan sırasında artan yeniden kullanım sayılarıyla birlikte kaydedilir. Senaryolar bölümlere TestSuiteMinimizer eşleştirmesiyle dağıtılır;
+        hiçbir senaryonun eşleşmediği bölümler eklenmez, böylece sonraki
+        dokümanlarda yeniden modele gönderilirler.
+
+        Args:
+            sections: plan çıktısındaki yeni bölümler
+            test_cases: Bu bölümler için üretilen senaryolar
+            model_name: Senaryoları üreten model
+
+        Returns:
+            Dizine eklenen bölüm sayısı
+        """
+        mapping = TestSuiteMinimizer().map_cases_to_sections(test_cases, sections)
+        section_cases = [[] for _ in sections]
+        for test_case, section_indices in zip(test_cases, mapping):
+            content = {key: value for key, value in test_case.items() if key != 'id'}
+            for index in section_indices:
+                section_cases[index].append(content)
+
+        added = 0
+        with self._lock:
+            for section, cases in zip(sections, section_cases):
+                if not cases:
+                    continue
+                normalized = normalize_section(section)
+                self._add_entry(section_hash(normalized), {
+                    'title': section['title'],
+                    'text': normalized,
+                    'test_cases': cases,
+                    'model_name': model_name,
+                    'created_at': datetime.now().isoformat(),
+                    'reuse_count': 0
+                })
+                added += 1
+        self.save()
+        return added
+
+    def stats(self) -> Dict:
+        """Dizindeki bölüm, senaryo ve yeniden kullanım sayıları"""
+        with self._lock:
+            return {
+                'sections': len(self.sections),
+                'test_cases': sum(len(entry['test_cases']) for entry in self.sections.values()),
+                'reuse_count': sum(entry.get('reuse_count', 0) for entry in self.sections.values())
+            }
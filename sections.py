@@ -0,0 +1,114 @@
+"""
+Gereksinim bölümleri modülü
+Gereksinim metnini numaralı başlıklara göre bölümlere ayırır ve bölüm/test
+senaryosu metinlerini karşılaştırma için normalize edilmiş kelime köklerine çevirir.
+"""
+import re
+from typing import Dict, List, Optional, Set
+
+
+# "2.1. Kullanıcı Kayıt İşlemi" veya "3 GÜVENLİK GEREKSİNİMLERİ" gibi numaralı başlıklar
+_HEADING = re.compile(r'^\s*(\d+(?:\.\d+)*)\.?\s+(\S.*?)\s*$')
+# PDF çıkarımındaki sayfa ayraçları
+_PAGE_MARKER = re.compile(r'^\s*--- Sayfa \d+ ---\s*$')
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+# Karşılaştırmada anlam taşımayan sık kelimeler
+STOPWORDS = {
+    've', 'veya', 'ile', 'için', 'bir', 'bu', 'şu', 'da', 'de', 'ki', 'mi', 'en', 'çok',
+    'olarak', 'olmalıdır', 'olmalı', 'gibi', 'ise', 'sonra', 'önce', 'her', 'ayrı',
+    'sistem', 'sistemi', 'kullanıcı', 'the', 'and', 'for', 'with', 'must', 'should'
+}
+
+# Türkçe ekler için basit önek kökleme uzunluğu
+STEM_LENGTH = 5
+
+
+def turkish_lower(text: str) -> str:
+    """Türkçe büyük/küçük harf kurallarına uygun küçük harfe çevir"""
+    return text.replace('I', 'ı').replace('İ', 'i').lower()
+
+
+def tokenize(text: str) -> Set[str]:
+    """
+    Metni karşılaştırma için kelime köklerine çevir
+
+    Küçük harfe çevirir, sayıları ve kısa/sık kelimeleri atar, kelimeleri ilk
+    STEM_LENGTH harfine kısaltır (ör. "şifresini" ve "şifre" aynı köke düşer).
+    """
+    tokens = set()
+    for word in _WORD.findall(turkish_lower(text)):
+        if len(word) < 3 or word.isdigit() or word in STOPWORDS:
+            continue
+        tokens.add(word[:STEM_LENGTH])
+    return tokens
+
+
+def heading_id(line: str) -> Optional[str]:
+    """Satır numaralı bir başlıksa bölüm numarasını döndür"""
+    heading = _HEADING.match(line)
+    return heading.group(1) if heading else None
+
+
+def is_page_marker(line: str) -> bool:
+    """Satır PDF çıkarımındaki bir sayfa ayracı mı"""
+    return bool(_PAGE_MARKER.match(line))
+
+
+def split_sections(text: str) -> List[Dict]:
+    """
+    Gereksinim metnini numaralı başlıklara göre bölümlere ayır
+
+    İçeriği olmayan başlıklar (ör. yalnızca alt bölümleri olan üst başlıklar)
+    atlanır. Metinde numaralı başlık yoksa boş satırlarla ayrılmış paragraflar
+    bölüm olarak kabul edilir.
+
+    Args:
+        text: Gereksinim metni
+
+    Returns:
+        section_id, title, text (başlık + içerik) ve bölümün metindeki satır
+        aralığını (start_line dahil, end_line hariç) içeren bölümler
+    """
+    lines = text.splitlines()
+    sections = []
+    current = None
+
+    for index, line in enumerate(lines):
+        if _PAGE_MARKER.match(line):
+            continue
+        heading = _HEADING.match(line)
+        if heading:
+            if current and current['body']:
+                sections.append(current)
+            current = {'section_id': heading.group(1), 'title': heading.group(2), 'body': [],
+                       'start_line': index}
+        elif line.strip() and current is not None:
+            current['body'].append(line.strip())
+        if current is not None:
+            current['end_line'] = index + 1
+    if current and current['body']:
+        sections.append(current)
+
+    if not sections:
+        # Boş satırlarla ayrılmış satır grupları paragraf olarak alınır
+        groups = []
+        for index, line in enumerate(lines):
+            if not line.strip():
+                continue
+            if groups and groups[-1][1] == index:
+                groups[-1][1] = index + 1
+            else:
+                groups.append([index, index + 1])
+        for i, (start, end) in enumerate(groups, start=1):
+            paragraph = '\n'.join(lines[start:end]).strip().splitlines()
+            sections.append({'section_id': f"P{i}", 'title': paragraph[0][:80], 'body': paragraph[1:],
+                             'start_line': start, 'end_line': end})
+
+    return [{
+        'section_id': section['section_id'],
+        'title': section['title'],
+        'text': '\n'.join([section['title']] + section['body']),
+        'start_line': section['start_line'],
+        'end_line': section['end_line']
+    } for section in sections]
@@ -0,0 +1,111 @@
+"""
+İstek birleştirme (single-flight) modülü
+Aynı anda gelen özdeş üretim isteklerinin (aynı model ve aynı gereksinim metni)
+tek bir model çağrısını paylaşmasını sağlar; çağrı bittiğinde tüm bekleyenler
+aynı sonucu alır.
+"""
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+
+def generation_key(model_type: str, requirement_text: str, *extra: Iterable[str]) -> str:
+    """
+    Model adı ve metin özetinden birleştirme anahtarı oluştur
+
+    Args:
+        model_type: Model adı
+        requirement_text: Gereksinim metni
+        extra: Sonucu etkileyen ek parametreler (ör. yedek modeller)
+
+    Returns:
+        Anahtar metni
+    """
+    digest = hashlib.sha256(requirement_text.encode('utf-8')).hexdigest()
+    parts = [model_type, digest] + [','.join(values) for values in extra]
+    return '|'.join(parts)
+
+
+class SharedCallError(Exception):
+    """
+    Paylaşılan çağrı başarısız olduğunda bekleyen isteklere iletilen hata
+
+    Çağrıyı yapan istek orijinal hatayı alır; bekleyenler bu sarmalayıcıyı alır,
+    böylece hatanın (ve harcanan kotanın) başka bir isteğe ait olduğunu bilir.
+    """
+
+    def __init__(self, error: BaseException):
+        super().__init__(str(error))
+        self.error = error
+
+
+class _Call:
+    """Devam eden tek bir çağrının sonucu"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """Aynı anahtarlı eşzamanlı çağrıları tek bir çalıştırmada birleştirir"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.total_calls = 0
+        self.coalesced_calls = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Anahtar için devam eden bir çağrı varsa onun sonucunu bekle, yoksa fn'i çalıştır
+
+        Args:
+            key: Birleştirme anahtarı
+            fn: Sonucu üreten fonksiyon
+
+        Returns:
+            (sonuç, paylaşıldı mı) — paylaşıldı ise sonuç başka bir isteğin çağrısından gelmiştir
+
+        Raises:
+            fn'in fırlattığı hata çağrıyı yapan isteğe olduğu gibi iletilir
+            SharedCallError: Bekleyen isteklere, orijinal hatayı error alanında taşır
+        """
+        with self._lock:
+            self.total_calls += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced_calls += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise SharedCallError(call.error) from call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> Dict:
+        """Toplam ve birleştirilen çağrı sayıları ile birleştirme oranı"""
+        with self._lock:
+            return {
+                'total_calls': self.total_calls,
+                'coalesced_calls': self.coalesced_calls,
+                'in_flight': len(self._calls),
+                'coalescing_ratio': round(self.coalesced_calls / self.total_calls * 100, 2) if self.total_calls else 0
+            }
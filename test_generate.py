@@ -1,22 +1,72 @@
 import streamlit as st
-import google.generativeai as genai
+import contextlib
+import copy
 import json
 import os
 import tempfile
 import time
 from dotenv import load_dotenv
 from parser import extract_text_from_pdf, extract_text_from_docx
-from metrics import PerformanceMetrics, TestCaseEvaluator, load_metrics_history, get_aggregate_statistics
+from metrics import PerformanceMetrics, METRICS_FILE
 from comparison import ManualVsAutomatedComparison
-import pandas as pd
+from generator import configure as configure_generator
+from tracing import Tracer, span
+from job_queue import GenerationJobQueue, JOB_QUEUED, JOB_RUNNING, JOB_DONE
+from minimizer import TestSuiteMinimizer
+# Not: google.generativeai, pandas, PyPDF2 ve docx ağır modüllerdir; yalnızca
+# ihtiyaç duyulan adımda (model çağrısı, metrik sekmesi, dosya parsing) yüklenir.
 
 # 2. Sayfa Ayarları
 st.set_page_config(page_title="Otomatik Test Üretici", layout="wide")
 st.title("🤖 NLP ile Gereksinimlerden Test Senaryosu Çıkarma")
 st.markdown("Yazılım Kalite Güvencesi ve Testi Projesi")
 
-# Sekmeler (Tabs) oluştur
-tab1, tab2, tab3, tab4 = st.tabs(["🏠 Ana Sayfa", "📊 Performans Metrikleri", "⚖️ Karşılaştırma", "📖 Dokümantasyon"])
+# Seçilebilir modeller
+MODEL_OPTIONS = [
+    "models/gemini-2.5-flash",
+    "models/gemini-2.5-pro",
+    "models/gemini-2.0-flash-exp",
+    "models/gemini-2.0-flash",
+    "models/gemini-2.0-flash-001",
+    "models/gemini-2.0-flash-exp-image-generation",
+    "models/gemini-2.0-flash-lite-001",
+    "models/gemini-2.0-flash-lite",
+    "models/gemini-2.0-flash-lite-preview-02-05",
+    "models/gemini-2.0-flash-lite-preview",
+    "models/gemini-exp-1206",
+    "models/gemini-2.5-flash-preview-tts",
+    "models/gemini-2.5-pro-preview-tts",
+    "models/gemma-3-1b-it",
+    "models/gemma-3-4b-it",
+    "models/gemma-3-12b-it",
+    "models/gemma-3-27b-it",
+    "models/gemma-3n-e4b-it",
+    "models/gemma-3n-e2b-it",
+    "models/gemini-flash-latest",
+    "models/gemini-flash-lite-latest",
+    "models/gemini-pro-latest",
+    "models/gemini-2.5-flash-lite",
+    "models/gemini-2.5-flash-image-preview",
+    "models/gemini-2.5-flash-image",
+    "models/gemini-2.5-flash-preview-09-2025",
+    "models/gemini-2.5-flash-lite-preview-09-2025",
+    "models/gemini-3-pro-preview",
+    "models/gemini-3-flash-preview",
+    "models/gemini-3-pro-image-preview",
+    "models/nano-banana-pro-preview",
+    "models/gemini-robotics-er-1.5-preview",
+    "models/gemini-2.5-computer-use-preview-10-2025",
+    "models/deep-research-pro-preview-12-2025",
+]
+
+# Sekmeler: st.tabs her yenilemede tüm sekmeleri çalıştırdığı için yalnızca
+# seçili sekmenin içeriği oluşturulur
+TAB_HOME = "🏠 Ana Sayfa"
+TAB_METRICS = "📊 Performans Metrikleri"
+TAB_COMPARISON = "⚖️ Karşılaştırma"
+TAB_DOCS = "📖 Dokümantasyon"
+active_tab = st.radio("Sekme", [TAB_HOME, TAB_METRICS, TAB_COMPARISON, TAB_DOCS],
+                      horizontal=True, key="active_tab", label_visibility="collapsed")
 
 # 3. Kenar Çubuğu (Sidebar) - Dosya Yükleme
 with st.sidebar:
@@ -27,44 +77,36 @@ with st.sidebar:
     st.divider()
     st.header("⚙️ Ayarlar")
     # Model Seçimi (Opsiyonel)
-    model_type = st.selectbox("Model Seçin", [
-        "models/gemini-2.5-flash",
-        "models/gemini-2.5-pro",
-        "models/gemini-2.0-flash-exp",
-        "models/gemini-2.0-flash",
-        "models/gemini-2.0-flash-001",
-        "models/gemini-2.0-flash-exp-image-generation",
-        "models/gemini-2.0-flash-lite-001",
-        "models/gemini-2.0-flash-lite",
-        "models/gemini-2.0-flash-lite-preview-02-05",
-        "models/gemini-2.0-flash-lite-preview",
-        "models/gemini-exp-1206",
-        "models/gemini-2.5-flash-preview-tts",
-        "models/gemini-2.5-pro-preview-tts",
-        "models/gemma-3-1b-it",
-        "models/gemma-3-4b-it",
-        "models/gemma-3-12b-it",
-        "models/gemma-3-27b-it",
-        "models/gemma-3n-e4b-it",
-        "models/gemma-3n-e2b-it",
-        "models/gemini-flash-latest",
-        "models/gemini-flash-lite-latest",
-        "models/gemini-pro-latest",
-        "models/gemini-2.5-flash-lite",
-        "models/gemini-2.5-flash-image-preview",
-        "models/gemini-2.5-flash-image",
-        "models/gemini-2.5-flash-preview-09-2025",
-        "models/gemini-2.5-flash-lite-preview-09-2025",
-        "models/gemini-3-pro-preview",
-        "models/gemini-3-flash-preview",
-        "models/gemini-3-pro-image-preview",
-        "models/nano-banana-pro-preview",
-        "models/gemini-robotics-er-1.5-preview",
-        "models/gemini-2.5-computer-use-preview-10-2025",
-        "models/deep-research-pro-preview-12-2025",
-    ])
+    model_type = st.selectbox("Model Seçin", MODEL_OPTIONS)
+    
+    # Hedged istek modu: birincil model yavaş kalırsa yedek modeller de yarışa girer
+    hedge_enabled = st.checkbox("⚡ Hedged istek modu", value=False,
+                                help="Aynı istek gecikmeli olarak yedek modellere de gönderilir, ilk geçerli yanıt kullanılır.")
+    fallback_models = []
+    hedge_delay = 2.0
+    if hedge_enabled:
+        fallback_models = st.multiselect("Yedek Modeller",
+                                         [m for m in MODEL_OPTIONS if m != model_type],
+                                         default=["models/gemini-2.0-flash"] if model_type != "models/gemini-2.0-flash" else [])
+        hedge_delay = st.slider("Yedek model gecikmesi (saniye)", 0.0, 30.0, 2.0, 0.5)
+    
+    # Otomatik model seçimi: geçmiş metriklere göre kalite eşiğini sağlayan en hızlı model
+    auto_route = st.checkbox("🧭 Otomatik model seçimi", value=False,
+                             help="Geçmiş çalıştırmalara göre doküman boyutu için kalite eşiğini sağlayan en hızlı model seçilir.")
+    quality_threshold = 80.0
+    if auto_route:
+        quality_threshold = st.slider("Minimum kalite skoru (%)", 0.0, 100.0, 80.0, 5.0)
+    
+    # Bölüm dizini: daha önce üretilmiş aynı/yakın bölümlerin senaryoları yeniden kullanılır
+    reuse_sections = st.checkbox("♻️ Ortak bölümleri yeniden kullan", value=True,
+                                 help="Önceki dokümanlarda görülen aynı ya da neredeyse aynı bölümler için kayıtlı senaryolar kullanılır, modele yalnızca yeni bölümler gönderilir.")
     
     save_metrics = st.checkbox("📊 Performans metriklerini kaydet", value=True)
+    
+    # İzleme: adım bazında span'ler ve isteğe bağlı cProfile profili
+    trace_run = st.checkbox("🔬 İzleme (trace) kaydet", value=False,
+                            help="Üretim adımları Chrome Trace formatında kaydedilir (chrome://tracing, Perfetto).")
+    profile_run = trace_run and st.checkbox("🧪 cProfile profili al", value=False)
 
 # 4. API Anahtarı Kontrolü
 if not api_key:
@@ -72,13 +114,184 @@ if not api_key:
     st.stop()
 else:
     try:
-        genai.configure(api_key=api_key)
+        configure_generator(api_key)
     except Exception as e:
         st.error(f"API anahtarı hatası: {e}")
         st.stop()
 
+@st.cache_resource
+def get_job_queue():
+    """Tüm oturumlar arasında paylaşılan üretim kuyruğu"""
+    return GenerationJobQueue(max_workers=4, results_dir='jobs', metrics_file=METRICS_FILE)
+
+
+job_queue = get_job_queue()
+
+
+@st.cache_resource(show_spinner="📊 Metrik geçmişi yükleniyor...")
+def get_dashboard_data(metrics_file):
+    """
+    Tüm oturumlar arasında paylaşılan, metrik dosyasını artımlı okuyan panel verisi
+
+    refresh() yalnızca son okumadan sonra eklenen kayıtları okur. Döndürdüğü
+    nesneler kopyalanmadan paylaşıldığı için salt okunur kullanılmalıdır.
+    """
+    from dashboard import DashboardData
+    return DashboardData(metrics_file)
+
+
+@st.fragment(run_every=2)
+def render_job_progress(job_id):
+    """Çalışan işin durumunu ve kısmi çıktısını periyodik olarak göster"""
+    job = job_queue.get_job(job_id)
+    if job is None or job['status'] not in (JOB_QUEUED, JOB_RUNNING):
+        # İş bitti, sonuçları göstermek için sayfayı yenile
+        st.rerun()
+    
+    if job['status'] == JOB_QUEUED:
+        st.info(f"⏳ İş kuyrukta bekliyor (#{job_id})")
+    else:
+        st.info(f"🤖 Yapay zeka gereksinimleri analiz ediyor... (#{job_id})")
+        if job['partial_text']:
+            with st.expander("📡 Kısmi Model Çıktısı", expanded=False):
+                st.code(job['partial_text'][-3000:])
+
+
+def render_generation_result(job, requirement_text):
+    """Tamamlanan işin test senaryolarını ve metriklerini göster"""
+    data = job['test_cases']
+    evaluation = job['evaluation']
+    perf_metrics = job['metrics']
+    
+    st.success(f"✅ Toplam {len(data)} adet test senaryosu oluşturuldu!")
+    
+    # Bölüm dizininden yeniden kullanılan bölümler
+    if job.get('section_reuse'):
+        reused_cases = perf_metrics.get('reused_test_cases') or 0
+        novel_sections = perf_metrics.get('novel_sections') or 0
+        st.info(f"♻️ {len(job['section_reuse'])} bölüm dizinden yeniden kullanıldı ({reused_cases} senaryo), "
+                f"{novel_sections} yeni bölüm modele gönderildi.")
+        with st.expander("♻️ Yeniden Kullanılan Bölümler"):
+            st.dataframe(job['section_reuse'], use_container_width=True)
+    
+    # Performans bilgileri
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("⏱️ İşlem Süresi", f"{perf_metrics.get('processing_time') or 0:.2f}s")
+    with col2:
+        st.metric("📄 Parsing Süresi", f"{perf_metrics.get('parsing_time') or 0:.2f}s")
+    with col3:
+        st.metric("🤖 AI Süresi", f"{perf_metrics.get('ai_generation_time') or 0:.2f}s")
+    with col4:
+        st.metric("📊 Kalite Skoru", f"{evaluation['coverage_score']:.1f}%")
+    
+    # Token kullanımı ve maliyet
+    if perf_metrics.get('input_tokens') is not None:
+        estimated_note = " (tahmini)" if perf_metrics.get('tokens_estimated') else ""
+        token_col1, token_col2, token_col3, token_col4 = st.columns(4)
+        with token_col1:
+            st.metric(f"📥 Giriş Token{estimated_note}", f"{perf_metrics['input_tokens']:,}")
+        with token_col2:
+            st.metric(f"📤 Çıkış Token{estimated_note}", f"{perf_metrics['output_tokens']:,}")
+        with token_col3:
+            tokens_per_second = perf_metrics.get('tokens_per_second')
+            st.metric("⚡ Token/sn", f"{tokens_per_second:.1f}" if tokens_per_second else "-")
+        with token_col4:
+            cost_per_test_case = perf_metrics.get('cost_per_test_case')
+            st.metric("💰 Test Başına Maliyet", f"${cost_per_test_case:.6f}" if cost_per_test_case is not None else "-")
+        if perf_metrics.get('coalesced'):
+            st.caption("🔗 Bu sonuç özdeş eşzamanlı bir istekle paylaşıldı, ek token harcanmadı.")
+    
+    # Değerlendirme sonuçları
+    st.subheader("📈 Test Senaryosu Değerlendirmesi")
+    eval_col1, eval_col2, eval_col3, eval_col4 = st.columns(4)
+    with eval_col1:
+        st.metric("✅ Geçerli Yapı", f"{evaluation['valid_structure_percent']:.1f}%", f"{evaluation['valid_structure']}/{evaluation['total_count']}")
+    with eval_col2:
+        st.metric("📋 Ön Koşul Var", f"{evaluation['has_prerequisites_percent']:.1f}%", f"{evaluation['has_prerequisites']}/{evaluation['total_count']}")
+    with eval_col3:
+        st.metric("📝 Adımlar Var", f"{evaluation['has_steps_percent']:.1f}%", f"{evaluation['has_steps']}/{evaluation['total_count']}")
+    with eval_col4:
+        st.metric("🎯 Beklenen Sonuç", f"{evaluation['has_expected_result_percent']:.1f}%", f"{evaluation['has_expected_result']}/{evaluation['total_count']}")
+    
+    # Test senaryoları tablosu
+    st.subheader("📋 Üretilen Test Senaryoları")
+    st.dataframe(data, use_container_width=True)
+    
+    # İndirme butonları
+    col_dl1, col_dl2 = st.columns(2)
+    with col_dl1:
+        st.download_button(
+            label="📥 Testleri JSON Olarak İndir",
+            data=json.dumps(data, indent=4, ensure_ascii=False),
+            file_name="test_senaryolari.json",
+            mime="application/json"
+        )
+    with col_dl2:
+        # Metrikleri de indirebilir
+        metrics_json = json.dumps(perf_metrics, indent=2, ensure_ascii=False)
+        st.download_button(
+            label="📊 Metrikleri İndir",
+            data=metrics_json,
+            file_name=f"metrics_{time.strftime('%Y%m%d_%H%M%S')}.json",
+            mime="application/json"
+        )
+    
+    # Kapsamı koruyan küçültme ve risk sıralaması
+    if st.toggle("✂️ Suiti Küçült ve Önceliklendir", key=f"minimize_{job['job_id']}",
+                 help="Her gereksinim bölümünü ve sınır değer/negatif kategorisini kapsayan en küçük alt kümeyi seçer"):
+        minimization = TestSuiteMinimizer().minimize(data, requirement_text)
+        report = minimization['report']
+        min_col1, min_col2, min_col3, min_col4 = st.columns(4)
+        with min_col1:
+            st.metric("📉 Senaryo Sayısı", report['reduced_count'], f"-{report['original_count'] - report['reduced_count']}", delta_color="inverse")
+        with min_col2:
+            st.metric("✂️ Küçülme", f"{report['reduction_percent']:.1f}%")
+        with min_col3:
+            st.metric("⏱️ Tahmini Çalıştırma", f"{report['reduced_seconds'] / 60:.1f} dk", f"-{report['time_saved_seconds'] / 60:.1f} dk", delta_color="inverse")
+        with min_col4:
+            st.metric("📚 Kapsanan Bölüm", f"{report['covered_sections']}/{report['section_count']}")
+        
+        if report['uncovered_sections']:
+            st.warning("⚠️ Hiçbir senaryonun kapsamadığı bölümler: " + ", ".join(report['uncovered_sections']))
+        if report['unmapped_ids']:
+            st.caption("📌 Hiçbir bölümle eşleşmediği için korunan senaryolar: " + ", ".join(str(test_id) for test_id in report['unmapped_ids']))
+        if report['removed_ids']:
+            st.caption("🗑️ Çıkarılan senaryolar: " + ", ".join(str(test_id) for test_id in report['removed_ids']))
+        
+        st.dataframe(minimization['prioritized'], use_container_width=True)
+        st.download_button(
+            label="📥 Küçültülmüş Suiti İndir",
+            data=json.dumps(minimization['test_cases'], indent=4, ensure_ascii=False),
+            file_name="test_senaryolari_kucultulmus.json",
+            mime="application/json",
+            key=f"download_minimized_{job['job_id']}"
+        )
+        st.download_button(
+            label="📊 Küçültme Raporunu İndir",
+            data=json.dumps(report, indent=2, ensure_ascii=False),
+            file_name="kucultme_raporu.json",
+            mime="application/json",
+            key=f"download_minimization_report_{job['job_id']}"
+        )
+    
+    # İzleme çıktıları
+    if job.get('trace_summary'):
+        with st.expander("🔬 İzleme Özeti"):
+            st.dataframe(job['trace_summary'], use_container_width=True)
+            trace_col1, trace_col2 = st.columns(2)
+            if job.get('trace_file') and os.path.exists(job['trace_file']):
+                with open(job['trace_file'], 'rb') as f:
+                    trace_col1.download_button("📥 Trace Dosyasını İndir", f.read(),
+                                               file_name=os.path.basename(job['trace_file']),
+                                               mime="application/json")
+            if job.get('profile_file') and os.path.exists(job['profile_file']):
+                with open(job['profile_file'], 'rb') as f:
+                    trace_col2.download_button("📥 cProfile Çıktısını İndir", f.read(),
+                                               file_name=os.path.basename(job['profile_file']))
+
 # Ana Sekme 1: Test Senaryosu Üretimi
-with tab1:
+if active_tab == TAB_HOME:
     if uploaded_file is not None:
         # Performans metrikleri başlat
         metrics = PerformanceMetrics()
@@ -89,32 +302,38 @@ with tab1:
         try:
             metrics.start_parsing()
             
-            if file_extension == '.txt':
-                stringio = uploaded_file.getvalue().decode("utf-8")
-            elif file_extension == '.pdf':
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                    tmp_file.write(uploaded_file.getvalue())
-                    tmp_path = tmp_file.name
-                try:
-                    stringio = extract_text_from_pdf(tmp_path)
-                finally:
-                    if os.path.exists(tmp_path):
-                        os.unlink(tmp_path)
-            elif file_extension in ['.doc', '.docx']:
-                if file_extension == '.doc':
-                    st.warning("⚠️ .doc dosyaları tam desteklenmeyebilir. .docx formatını tercih edin.")
-                suffix = '.docx' if file_extension == '.docx' else '.doc'
-                with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
-                    tmp_file.write(uploaded_file.getvalue())
-                    tmp_path = tmp_file.name
-                try:
-                    stringio = extract_text_from_docx(tmp_path)
-                finally:
-                    if os.path.exists(tmp_path):
-                        os.unlink(tmp_path)
-            else:
-                st.error(f"Desteklenmeyen dosya formatı: {file_extension}")
-                st.stop()
+            # İzleme açıksa parsing adımları da aynı trace'e yazılır
+            run_tracer = Tracer(uploaded_file.name, profile=profile_run) if trace_run else None
+            with run_tracer.activate() if run_tracer else contextlib.nullcontext(), \
+                    span('parse_file', file_type=file_extension, file_size=file_size):
+                if file_extension == '.txt':
+                    stringio = uploaded_file.getvalue().decode("utf-8")
+                elif file_extension == '.pdf':
+                    with span('temp_file_write'), tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
+                        tmp_file.write(uploaded_file.getvalue())
+                        tmp_path = tmp_file.name
+                    try:
+                        with span('extract_pdf'):
+                            stringio = extract_text_from_pdf(tmp_path)
+                    finally:
+                        if os.path.exists(tmp_path):
+                            os.unlink(tmp_path)
+                elif file_extension in ['.doc', '.docx']:
+                    if file_extension == '.doc':
+                        st.warning("⚠️ .doc dosyaları tam desteklenmeyebilir. .docx formatını tercih edin.")
+                    suffix = '.docx' if file_extension == '.docx' else '.doc'
+                    with span('temp_file_write'), tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+                        tmp_file.write(uploaded_file.getvalue())
+                        tmp_path = tmp_file.name
+                    try:
+                        with span('extract_docx'):
+                            stringio = extract_text_from_docx(tmp_path)
+                    finally:
+                        if os.path.exists(tmp_path):
+                            os.unlink(tmp_path)
+                else:
+                    st.error(f"Desteklenmeyen dosya formatı: {file_extension}")
+                    st.stop()
             
             metrics.end_parsing()
             metrics.start_processing(uploaded_file.name, file_extension, file_size, len(stringio))
@@ -131,112 +350,45 @@ with tab1:
             st.stop()
         
         if st.button("🚀 Test Senaryolarını Otomatik Oluştur", type="primary"):
-            with st.spinner("🤖 Yapay zeka gereksinimleri analiz ediyor..."):
-                try:
-                    metrics.start_ai_generation(model_type)
-                    
-                    # Gemini'ye Gönderilecek Prompt
-                    prompt = f"""
-                    Sen uzman bir Yazılım Test Mühendisisin.
-                    Aşağıdaki gereksinim metnini analiz et.
-                    Tüm olası sınır değerleri, hatalı girişleri ve mutlu yol (happy path) senaryolarını düşün.
-                    
-                    Gereksinim Metni:
-                    "{stringio}"
-                    
-                    Çıktıyı SADECE aşağıdaki JSON formatında ver, başka bir açıklama yapma:
-                    [
-                      {{"id": "TC001", "baslik": "...", "on_kosul": "...", "adimlar": "...", "beklenen_sonuc": "..."}},
-                      {{"id": "TC002", "baslik": "...", "on_kosul": "...", "adimlar": "...", "beklenen_sonuc": "..."}}
-                    ]
-                    """
-                    
-                    # Modeli çağırma
-                    model = genai.GenerativeModel(model_type)
-                    response = model.generate_content(prompt)
-                    
-                    metrics.end_ai_generation()
-                    
-                    # Gelen yanıtı JSON'a çevirip tablo yapma
-                    try:
-                        cleaned_text = response.text.replace("```json", "").replace("```", "").strip()
-                        data = json.loads(cleaned_text)
-                        
-                        # Metrikleri tamamla
-                        metrics.end_processing(data, True)
-                        if save_metrics:
-                            metrics.save_to_file('metrics.json')
-                        
-                        # Test senaryolarını değerlendir
-                        evaluator = TestCaseEvaluator()
-                        evaluation = evaluator.evaluate_test_cases(data)
-                        
-                        st.success(f"✅ Toplam {len(data)} adet test senaryosu oluşturuldu!")
-                        
-                        # Performans bilgileri
-                        perf_metrics = metrics.get_metrics()
-                        col1, col2, col3, col4 = st.columns(4)
-                        with col1:
-                            st.metric("⏱️ İşlem Süresi", f"{perf_metrics.get('processing_time', 0):.2f}s")
-                        with col2:
-                            st.metric("📄 Parsing Süresi", f"{perf_metrics.get('parsing_time', 0):.2f}s")
-                        with col3:
-                            st.metric("🤖 AI Süresi", f"{perf_metrics.get('ai_generation_time', 0):.2f}s")
-                        with col4:
-                            st.metric("📊 Kalite Skoru", f"{evaluation['coverage_score']:.1f}%")
-                        
-                        # Değerlendirme sonuçları
-                        st.subheader("📈 Test Senaryosu Değerlendirmesi")
-                        eval_col1, eval_col2, eval_col3, eval_col4 = st.columns(4)
-                        with eval_col1:
-                            st.metric("✅ Geçerli Yapı", f"{evaluation['valid_structure_percent']:.1f}%", f"{evaluation['valid_structure']}/{evaluation['total_count']}")
-                        with eval_col2:
-                            st.metric("📋 Ön Koşul Var", f"{evaluation['has_prerequisites_percent']:.1f}%", f"{evaluation['has_prerequisites']}/{evaluation['total_count']}")
-                        with eval_col3:
-                            st.metric("📝 Adımlar Var", f"{evaluation['has_steps_percent']:.1f}%", f"{evaluation['has_steps']}/{evaluation['total_count']}")
-                        with eval_col4:
-                            st.metric("🎯 Beklenen Sonuç", f"{evaluation['has_expected_result_percent']:.1f}%", f"{evaluation['has_expected_result']}/{evaluation['total_count']}")
-                        
-                        # Session state'e kaydet (karşılaştırma için)
-                        st.session_state.last_generated_tests = data
-                        st.session_state.last_requirement_text = stringio
-                        
-                        # Test senaryoları tablosu
-                        st.subheader("📋 Üretilen Test Senaryoları")
-                        st.dataframe(data, use_container_width=True)
-                        
-                        # İndirme butonları
-                        col_dl1, col_dl2 = st.columns(2)
-                        with col_dl1:
-                            st.download_button(
-                                label="📥 Testleri JSON Olarak İndir",
-                                data=json.dumps(data, indent=4, ensure_ascii=False),
-                                file_name="test_senaryolari.json",
-                                mime="application/json"
-                            )
-                        with col_dl2:
-                            # Metrikleri de indirebilir
-                            metrics_json = json.dumps(perf_metrics, indent=2, ensure_ascii=False)
-                            st.download_button(
-                                label="📊 Metrikleri İndir",
-                                data=metrics_json,
-                                file_name=f"metrics_{time.strftime('%Y%m%d_%H%M%S')}.json",
-                                mime="application/json"
-                            )
-                        
-                    except json.JSONDecodeError as e:
-                        st.error("❌ Model çıktısı JSON formatında değil!")
-                        st.warning("Ham metin çıktısı:")
-                        st.code(response.text)
-                        metrics.end_processing([], False, f"JSON parse hatası: {str(e)}")
-                        if save_metrics:
-                            metrics.save_to_file('metrics.json')
-                        
-                except Exception as e:
-                    st.error(f"❌ Bir hata oluştu: {e}")
-                    metrics.end_processing([], False, str(e))
-                    if save_metrics:
-                        metrics.save_to_file('metrics.json')
+            selected_model = model_type
+            if auto_route:
+                # Paneldeki önbellekli yönlendirici kullanılır, yalnızca eşik kopyada değişir
+                router = copy.copy(get_dashboard_data(METRICS_FILE).refresh()['router'])
+                router.quality_threshold = quality_threshold
+                selected_model, route_reason = router.select_model(len(stringio), model_type)
+                st.session_state.route_info = f"🧭 Seçilen model: {selected_model} — {route_reason}"
+            else:
+                st.session_state.route_info = None
+            
+            # Üretimi arka plan kuyruğuna gönder, arayüz iş durumunu sorgular
+            st.session_state.current_job_id = job_queue.submit(stringio, selected_model, metrics, save_metrics,
+                                                               fallback_models=fallback_models,
+                                                               hedge_delay=hedge_delay,
+                                                               tracer=run_tracer,
+                                                               reuse_sections=reuse_sections)
+            st.session_state.current_job_text = stringio
+        
+        current_job_id = st.session_state.get('current_job_id')
+        if current_job_id:
+            if st.session_state.get('route_info'):
+                st.caption(st.session_state.route_info)
+            job = job_queue.get_job(current_job_id)
+            if job is not None and job.get('export_error'):
+                st.warning(f"⚠️ {job['export_error']}")
+            if job is None:
+                st.warning("⚠️ Üretim işi bulunamadı. Lütfen tekrar deneyin.")
+            elif job['status'] in (JOB_QUEUED, JOB_RUNNING):
+                render_job_progress(current_job_id)
+            elif job['status'] == JOB_DONE:
+                # Session state'e kaydet (karşılaştırma için)
+                st.session_state.last_generated_tests = job['test_cases']
+                st.session_state.last_requirement_text = st.session_state.get('current_job_text', stringio)
+                render_generation_result(job, st.session_state.last_requirement_text)
+            else:
+                st.error(f"❌ Bir hata oluştu: {job['error_message']}")
+                if job.get('raw_text'):
+                    st.warning("Ham metin çıktısı:")
+                    st.code(job['raw_text'])
     else:
         st.info("📁 Lütfen sol menüden bir dosya yükleyin (.txt, .pdf, .doc, .docx formatlarında).")
         st.markdown("""
@@ -249,16 +401,17 @@ with tab1:
         """)
 
 # Sekme 2: Performans Metrikleri
-with tab2:
+elif active_tab == TAB_METRICS:
+    import pandas as pd
+    from dashboard import MAX_CHART_POINTS, MAX_PAGE_SIZE, downsample, filter_options, filter_runs, paginate
+    
     st.header("📊 Performans Metrikleri ve İstatistikler")
     
-    metrics_file = 'metrics.json'
-    if os.path.exists(metrics_file):
-        metrics_history = load_metrics_history(metrics_file)
-        
-        if metrics_history:
+    dashboard_data = get_dashboard_data(METRICS_FILE).refresh()
+    if os.path.exists(METRICS_FILE):
+        if not dashboard_data['frame'].empty:
             # Toplu istatistikler
-            stats = get_aggregate_statistics(metrics_history)
+            stats = dashboard_data['stats']
             st.subheader("📈 Genel İstatistikler")
             
             col1, col2, col3, col4 = st.columns(4)
@@ -271,49 +424,118 @@ with tab2:
             with col4:
                 st.metric("📋 Ortalama Test Sayısı", f"{stats.get('avg_test_cases', 0):.1f}")
             
-            # Detaylı tablo
+            if 'coalescing_ratio' in stats:
+                flight_stats = job_queue.single_flight.stats()
+                st.caption(f"🔗 İstek birleştirme: {stats['coalesced_runs']} çalıştırma özdeş eşzamanlı bir istekle "
+                           f"model çağrısını paylaştı (%{stats['coalescing_ratio']:.1f}). "
+                           f"Bu sunucu oturumunda: {flight_stats['coalesced_calls']}/{flight_stats['total_calls']} çağrı birleştirildi.")
+            
+            if stats.get('reused_sections'):
+                index_stats = job_queue.requirement_index.stats()
+                st.caption(f"♻️ Bölüm dizini: {stats['reused_sections']} bölüm modele gönderilmeden yeniden kullanıldı "
+                           f"(%{stats['section_reuse_ratio']:.1f}). Dizinde {index_stats['sections']} bölüm ve "
+                           f"{index_stats['test_cases']} senaryo var.")
+            
+            # Detaylı tablo: filtrelenir ve sayfa sayfa gönderilir
             st.subheader("📋 Detaylı Metrik Geçmişi")
-            df = pd.DataFrame(metrics_history)
+            metrics_frame = dashboard_data['frame']
+            options = filter_options(metrics_frame)
             
-            # Sadece başarılı olanları göster
-            if 'success' in df.columns:
-                df_success = df[df['success'] == True].copy()
-            else:
-                df_success = df.copy()
+            filter_col1, filter_col2, filter_col3, filter_col4 = st.columns([3, 2, 3, 1])
+            with filter_col1:
+                selected_models = st.multiselect("🤖 Model", options['models'], key="history_models")
+            with filter_col2:
+                selected_types = st.multiselect("📁 Dosya Türü", options['file_types'], key="history_types")
+            with filter_col3:
+                date_range = st.date_input("📅 Tarih Aralığı",
+                                           value=(options['min_date'], options['max_date']) if options['min_date'] else (),
+                                           key="history_dates")
+            with filter_col4:
+                page_size = st.selectbox("Satır", [25, 50, 100, MAX_PAGE_SIZE], index=1, key="history_page_size")
+            
+            start_date, end_date = (tuple(date_range) + (None, None))[:2] if date_range else (None, None)
+            df_success = filter_runs(metrics_frame, selected_models, selected_types,
+                                     start_date, end_date or start_date)
             
             if not df_success.empty:
-                # Tarih formatını düzelt
-                if 'timestamp' in df_success.columns:
-                    df_success['timestamp'] = pd.to_datetime(df_success['timestamp']).dt.strftime('%Y-%m-%d %H:%M:%S')
+                page = st.number_input("Sayfa", min_value=1, value=1, step=1, key="history_page")
+                page_frame, total_pages = paginate(df_success, int(page), page_size)
                 
-                # Gösterilecek kolonlar
-                display_cols = ['timestamp', 'file_name', 'file_type', 'processing_time', 
-                              'total_test_cases', 'model_name']
-                available_cols = [col for col in display_cols if col in df_success.columns]
-                st.dataframe(df_success[available_cols], use_container_width=True)
+                display_cols = ['timestamp', 'file_name', 'file_type', 'processing_time',
+                                'total_test_cases', 'model_name']
+                page_frame = page_frame[display_cols].copy()
+                page_frame['timestamp'] = page_frame['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
+                st.dataframe(page_frame, use_container_width=True, hide_index=True)
+                st.caption(f"🔎 Filtreye uyan {len(df_success):,} başarılı çalıştırmadan {len(page_frame)} tanesi gösteriliyor "
+                           f"(sayfa {min(int(page), total_pages)}/{total_pages})")
                 
-                # Grafikler
+                # Grafikler: zaman aralıklarına indirgenmiş özet
                 st.subheader("📊 Grafik Analizleri")
+                chart_data, bucket = downsample(df_success, MAX_CHART_POINTS)
                 chart_col1, chart_col2 = st.columns(2)
                 
                 with chart_col1:
-                    if 'processing_time' in df_success.columns:
-                        st.bar_chart(df_success.set_index('file_name')['processing_time'])
-                        st.caption("📁 Dosya Bazında İşlem Süreleri")
+                    st.line_chart(chart_data[['avg_processing_time', 'max_processing_time']])
+                    st.caption(f"⏱️ İşlem Süreleri ({bucket} aralıklarla ortalama ve en yüksek)")
                 
                 with chart_col2:
-                    if 'total_test_cases' in df_success.columns:
-                        st.bar_chart(df_success.set_index('file_name')['total_test_cases'])
-                        st.caption("📋 Dosya Bazında Üretilen Test Sayıları")
+                    st.bar_chart(chart_data['total_test_cases'])
+                    st.caption(f"📋 Üretilen Test Sayıları ({bucket} aralıklarla toplam)")
+            else:
+                st.warning("📭 Filtreye uyan başarılı çalıştırma bulunamadı.")
+            
+            # Token kullanımı ve maliyet
+            token_stats = dashboard_data['token_stats']
+            if token_stats:
+                st.subheader("🪙 Token Kullanımı ve Maliyet")
+                token_col1, token_col2, token_col3, token_col4 = st.columns(4)
+                with token_col1:
+                    st.metric("📥 Toplam Giriş Token", f"{stats.get('total_input_tokens', 0):,}")
+                with token_col2:
+                    st.metric("📤 Toplam Çıkış Token", f"{stats.get('total_output_tokens', 0):,}")
+                with token_col3:
+                    st.metric("💰 Toplam Maliyet", f"${stats.get('total_cost_usd', 0):.4f}")
+                with token_col4:
+                    avg_cost = stats.get('avg_cost_per_test_case')
+                    st.metric("📋 Test Başına Ort. Maliyet", f"${avg_cost:.6f}" if pd.notna(avg_cost) else "-")
+                
+                df_tokens = pd.DataFrame(token_stats).set_index('model_name')
+                st.dataframe(df_tokens, use_container_width=True)
+                token_chart_col1, token_chart_col2 = st.columns(2)
+                with token_chart_col1:
+                    st.bar_chart(df_tokens[['input_tokens', 'output_tokens']])
+                    st.caption("🪙 Model Bazında Token Kullanımı")
+                with token_chart_col2:
+                    st.bar_chart(df_tokens['total_cost_usd'].fillna(0))
+                    st.caption("💰 Model Bazında Toplam Maliyet (USD)")
+            
+            # Otomatik model seçimi skor tablosu
+            st.subheader("🧭 Model Seçimi Skor Tablosu")
+            route_length = st.number_input("Doküman uzunluğu (karakter)", min_value=0, value=10000, step=1000)
+            route_threshold = st.slider("Minimum kalite skoru (%)", 0.0, 100.0, quality_threshold, 5.0, key="route_threshold")
+            # Önbellekteki yönlendiricinin geçmiş tablosu paylaşılır, yalnızca eşik kopyada değişir
+            router = copy.copy(dashboard_data['router'])
+            router.quality_threshold = route_threshold
+            scoreboard = router.scoreboard(int(route_length))
+            if scoreboard:
+                st.dataframe(pd.DataFrame(scoreboard), use_container_width=True)
+                st.caption("⚡ Uygun modeller tahmini süreye göre sıralanır; 'reason' sütunu seçim gerekçesini açıklar")
             else:
-                st.warning("📭 Başarılı çalıştırma bulunamadı.")
+                st.info("📭 Skor tablosu için yeterli model geçmişi yok.")
+            
+            # Hedged istek yarış istatistikleri
+            race_stats = dashboard_data['race_stats']
+            if race_stats:
+                st.subheader("⚡ Hedged İstek Yarış İstatistikleri")
+                st.dataframe(pd.DataFrame(race_stats), use_container_width=True)
+                st.caption("🏁 Model bazında kazanma oranı (%) ve gecikme (saniye)")
         else:
             st.info("📭 Henüz metrik kaydı yok. Ana sayfadan test senaryosu üretin.")
     else:
         st.info("📭 Henüz metrik dosyası oluşturulmamış. Ana sayfadan test senaryosu üretin.")
 
 # Sekme 3: Karşılaştırma
-with tab3:
+elif active_tab == TAB_COMPARISON:
     st.header("⚖️ Manuel vs Otomatik Test Üretimi Karşılaştırması")
     
     st.markdown("""
@@ -374,7 +596,7 @@ with tab3:
         st.info("📁 Manuel test senaryolarını yüklemek için JSON dosyası seçin.")
 
 # Sekme 4: Dokümantasyon
-with tab4:
+elif active_tab == TAB_DOCS:
     st.header("📖 Sistem Dokümantasyonu")
     
     st.markdown("""
@@ -0,0 +1,72 @@
+"""
+Token kullanımı ve maliyet modülü
+Model yanıtındaki kullanım bilgisinden (ya da yerel tahminle) giriş/çıkış token
+sayılarını çıkarır ve model fiyatlarına göre maliyet hesaplar.
+"""
+from typing import Dict, Optional, Tuple
+
+
+# Yaklaşık karakter/token oranı (yanıtta kullanım bilgisi yoksa tahmin için)
+CHARS_PER_TOKEN = 4
+
+# 1M token başına USD fiyatları (giriş, çıkış); en uzun önek eşleşmesi kullanılır.
+# Fiyatlar değişebilir, güncel değerler için Google AI fiyatlandırma sayfasına bakın.
+MODEL_PRICING = {
+    'models/gemini-2.5-pro': (1.25, 10.00),
+    'models/gemini-2.5-flash': (0.30, 2.50),
+    'models/gemini-2.5-flash-lite': (0.10, 0.40),
+    'models/gemini-2.0-flash': (0.10, 0.40),
+    'models/gemini-2.0-flash-lite': (0.075, 0.30),
+    'models/gemini-flash-latest': (0.30, 2.50),
+    'models/gemini-flash-lite-latest': (0.10, 0.40),
+    'models/gemini-pro-latest': (1.25, 10.00),
+    'models/gemini-3-pro-preview': (2.00, 12.00),
+    'models/gemma-3': (0.0, 0.0)
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Metnin token sayısını karakter sayısından tahmin et"""
+    if not text:
+        return 0
+    return max(1, round(len(text) / CHARS_PER_TOKEN))
+
+
+def usage_from_response(response, prompt: str, response_text: str) -> Dict:
+    """
+    Model yanıtından token kullanımını çıkar, yoksa yerel olarak tahmin et
+
+    Args:
+        response: google.generativeai yanıt nesnesi (usage_metadata içerebilir)
+        prompt: Gönderilen prompt
+        response_text: Modelin ham metin çıktısı
+
+    Returns:
+        input_tokens, output_tokens ve tahmin olup olmadığı
+    """
+    metadata = getattr(response, 'usage_metadata', None)
+    input_tokens = getattr(metadata, 'prompt_token_count', None) if metadata else None
+    output_tokens = getattr(metadata, 'candidates_token_count', None) if metadata else None
+
+    if input_tokens and output_tokens is not None:
+        return {'input_tokens': int(input_tokens), 'output_tokens': int(output_tokens), 'estimated': False}
+
+    return {'input_tokens': estimate_tokens(prompt), 'output_tokens': estimate_tokens(response_text),
+            'estimated': True}
+
+
+def model_pricing(model_name: str) -> Optional[Tuple[float, float]]:
+    """Model için (giriş, çıkış) 1M token fiyatını döndür, bilinmiyorsa None"""
+    matches = [prefix for prefix in MODEL_PRICING if model_name and model_name.startswith(prefix)]
+    if not matches:
+        return None
+    return MODEL_PRICING[max(matches, key=len)]
+
+
+def calculate_cost(model_name: str, input_tokens: int, output_tokens: int) -> Optional[float]:
+    """Token sayılarından USD maliyet hesapla, fiyatı bilinmeyen modeller için None"""
+    pricing = model_pricing(model_name)
+    if pricing is None:
+        return None
+    input_price, output_price = pricing
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
@@ -0,0 +1,161 @@
+"""
+İzleme (tracing) ve profil modülü
+Üretim hattının adımlarını iç içe span'ler olarak ölçer, isteğe bağlı olarak
+cProfile profili alır ve sonuçları Chrome Trace Event formatında dışa aktarır
+(chrome://tracing, Perfetto veya speedscope ile açılabilir).
+
+Kullanım:
+    tracer = Tracer('uretim')
+    with tracer.activate():
+        with span('model_call', model='models/gemini-2.5-flash'):
+            ...
+    tracer.export_chrome_trace('trace.json')
+
+Aktif bir tracer yoksa `span` hiçbir şey yapmaz, bu yüzden modüller ölçüm
+noktalarını koşulsuz ekleyebilir.
+"""
+import contextlib
+import contextvars
+import cProfile
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+_active_tracer = contextvars.ContextVar('active_tracer', default=None)
+_current_span = contextvars.ContextVar('current_span', default=None)
+_span_ids = itertools.count(1)
+
+
+class Tracer:
+    """Bir çalıştırmaya ait span'leri ve isteğe bağlı profili toplar"""
+
+    def __init__(self, name: str = 'run', profile: bool = False):
+        """
+        Args:
+            name: Çalıştırmanın adı (trace dosyasında süreç adı olarak görünür)
+            profile: True ise aktif olduğu sürece cProfile profili alınır
+        """
+        self.name = name
+        self.profile = profile
+        self.spans: List[Dict] = []
+        self.profile_error: Optional[str] = None
+        self._origin_ns = time.perf_counter_ns()
+        self._lock = threading.Lock()
+        self._profiler = cProfile.Profile() if profile else None
+        self._profiled = False
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Tracer'ı mevcut iş parçacığında/bağlamda aktif yap"""
+        token = _active_tracer.set(self)
+        profiling = False
+        if self._profiler is not None:
+            try:
+                self._profiler.enable()
+                profiling = True
+                self._profiled = True
+            except ValueError as e:
+                # Aynı anda yalnızca bir profilleyici çalışabilir
+                self.profile_error = str(e)
+        try:
+            yield self
+        finally:
+            if profiling:
+                self._profiler.disable()
+            _active_tracer.reset(token)
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attrs):
+        """İç içe geçebilen bir ölçüm aralığı aç"""
+        record = {
+            'id': next(_span_ids),
+            'name': name,
+            'parent': _current_span.get(),
+            'thread_id': threading.get_ident(),
+            'thread_name': threading.current_thread().name,
+            'start_ns': time.perf_counter_ns() - self._origin_ns,
+            'duration_ns': None,
+            'attrs': attrs
+        }
+        token = _current_span.set(record['id'])
+        try:
+            yield record
+        except Exception as e:
+            record['attrs']['error'] = str(e)
+            raise
+        finally:
+            record['duration_ns'] = time.perf_counter_ns() - self._origin_ns - record['start_ns']
+            _current_span.reset(token)
+            with self._lock:
+                self.spans.append(record)
+
+    def summary(self) -> List[Dict]:
+        """Span adlarına göre toplam süre ve çağrı sayısı"""
+        totals: Dict[str, Dict] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for record in spans:
+            entry = totals.setdefault(record['name'], {'name': record['name'], 'count': 0, 'total_seconds': 0.0})
+            entry['count'] += 1
+            entry['total_seconds'] += record['duration_ns'] / 1e9
+        for entry in totals.values():
+            entry['total_seconds'] = round(entry['total_seconds'], 6)
+        return sorted(totals.values(), key=lambda e: e['total_seconds'], reverse=True)
+
+    def to_chrome_trace(self) -> Dict:
+        """Span'leri Chrome Trace Event formatına çevir"""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda r: r['start_ns'])
+
+        pid = os.getpid()
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': self.name}}]
+        threads = {}
+        for record in spans:
+            threads.setdefault(record['thread_id'], record['thread_name'])
+            events.append({
+                'name': record['name'],
+                'cat': 'pipeline',
+                'ph': 'X',
+                'ts': record['start_ns'] / 1000,
+                'dur': record['duration_ns'] / 1000,
+                'pid': pid,
+                'tid': record['thread_id'],
+                'args': {key: str(value) for key, value in record['attrs'].items()}
+            })
+        for thread_id, thread_name in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread_id,
+                           'args': {'name': thread_name}})
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, filepath: str) -> str:
+        """Trace dosyasını kaydet"""
+        os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+        return filepath
+
+    def export_profile(self, filepath: str) -> Optional[str]:
+        """cProfile sonucunu pstats formatında kaydet (snakeviz vb. ile açılabilir)"""
+        if self._profiler is None or not self._profiled:
+            return None
+        os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+        self._profiler.dump_stats(filepath)
+        return filepath
+
+
+def current_tracer() -> Optional[Tracer]:
+    """Mevcut bağlamda aktif olan tracer'ı döndür"""
+    return _active_tracer.get()
+
+
+def span(name: str, **attrs):
+    """Aktif tracer varsa span aç, yoksa hiçbir şey yapma"""
+    tracer = _active_tracer.get()
+    if tracer is None:
+        return contextlib.nullcontext()
+    return tracer.span(name, **attrs)